@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+from io import BytesIO
+from time import perf_counter
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fifth import open_workbook_source
+
+def make_attachment_bytes(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['MIPS', 'date', 'start time', 'end time'])
+    for i in range(rows):
+        sheet.append([100.0 + i, '2024-05-06', '09', '17 BST'])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def tempfile_path(data):
+    # The old process_jira_ticket path: write, reopen by name, unlink
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
+        temp_file.write(data)
+        temp_file_path = temp_file.name
+    try:
+        openpyxl.load_workbook(temp_file_path)
+    finally:
+        os.unlink(temp_file_path)
+
+def in_memory_path(data):
+    openpyxl.load_workbook(open_workbook_source(data))
+
+def tempfile_io_only(data):
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
+        temp_file.write(data)
+        temp_file_path = temp_file.name
+    with open(temp_file_path, 'rb') as f:
+        f.read()
+    os.unlink(temp_file_path)
+
+def in_memory_io_only(data):
+    open_workbook_source(data).read()
+
+def timeit(func, data, repeat):
+    start = perf_counter()
+    for _ in range(repeat):
+        func(data)
+    return (perf_counter() - start) / repeat
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    for rows in (5, 1000, 20000):
+        data = make_attachment_bytes(rows)
+        print(f"{rows} rows ({len(data) / 1024:.0f} KiB attachment):")
+        for name, func in (('tempfile I/O only', tempfile_io_only), ('in-memory I/O only', in_memory_io_only),
+                           ('tempfile + load_workbook', tempfile_path), ('in-memory + load_workbook', in_memory_path)):
+            print(f"  {name:28s} {timeit(func, data, repeat if rows < 20000 else 3) * 1000:9.3f} ms/ticket")
@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_workbooks import make_workbook
+
+# Runs process_jira_tickets against a local stub JIRA that adds latency and injects 429/503
+# responses, once with a plain JIRA client and once with the slot_jira session, and
+# reports throughput, peak requests in flight, failed tickets and duplicate comments.
+# StubJira is also the fake JIRA the tests run the watcher and slot_jira against.
+
+ISSUE_PATH = re.compile(r'^/rest/api/2/issue/([^/]+)$')
+COMMENT_PATH = re.compile(r'^/rest/api/2/issue/([^/]+)/comment$')
+JQL_SINCE = re.compile(r'updated >= "([^"]+)"')
+DEFAULT_UPDATED = '2026-10-17T10:00:00.000+0000'
+
+def jira_time(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + moment.strftime('%z')
+
+def jira_now():
+    return jira_time(datetime.now(timezone.utc))
+
+class StubJira(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.05, error_rate=0.1, workbook=b''):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.latency = latency  # seconds, uniform 0..latency per request
+        self.error_rate = error_rate  # share of requests answered with 429 or 503
+        self.workbook = workbook
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.injected = 0
+        self.resets = 0  # connections dropped by the client, e.g. on pool overflow
+        self.comments = {}  # issue key -> comment bodies
+        self.updated = {}  # issue key -> 'updated' timestamp; these are the issues search returns
+        self.failures = {}  # issue key -> number of GETs of the issue still to answer with 503
+        # (method, path) -> [(status, retry_after, delay)], used up one per request: the
+        # request waits delay seconds, then gets status, or its normal reply when status is None
+        self.faults = {}
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionResetError):
+            with self.lock:
+                self.resets += 1
+        else:
+            super().handle_error(request, client_address)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b'', content_type='application/json', headers=()):
+        # The client may send its next request as soon as this one is answered
+        self.finished()
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def finished(self):
+        if self.in_flight:
+            self.in_flight = False
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def handle_request(self, method):
+        stub = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with stub.lock:
+            stub.requests += 1
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        self.in_flight = True
+        try:
+            sleep(random.uniform(0, stub.latency))
+            if self.path != '/rest/api/2/serverInfo' and random.random() < stub.error_rate:
+                with stub.lock:
+                    stub.injected += 1
+                if random.random() < 0.5:
+                    return self.reply(429, {'errorMessages': ['Rate limit exceeded']}, headers=[('Retry-After', '0')])
+                return self.reply(503, {'errorMessages': ['Service unavailable']})
+
+            with stub.lock:
+                queued = stub.faults.get((method, self.path.split('?')[0]))
+                fault = queued.pop(0) if queued else None
+            if fault is not None:
+                status, retry_after, delay = fault
+                sleep(delay)
+                if status is not None:
+                    headers = [('Retry-After', str(retry_after))] if retry_after is not None else []
+                    return self.reply(status, {'errorMessages': [f'Injected {status}']}, headers=headers)
+
+            if self.path == '/rest/api/2/serverInfo':
+                return self.reply(200, {'versionNumbers': [9, 4, 0], 'version': '9.4.0', 'deploymentType': 'Server'})
+            if method == 'GET' and self.path == '/rest/api/2/field':
+                return self.reply(200, [{'id': 'updated', 'name': 'Updated', 'clauseNames': ['updated']}])
+            if method == 'GET' and self.path.startswith('/rest/api/2/search?'):
+                return self.reply(200, self.search(parse_qs(urlsplit(self.path).query)))
+            match = ISSUE_PATH.match(self.path.split('?')[0])
+            if method == 'GET' and match:
+                key = match.group(1)
+                with stub.lock:
+                    failing = stub.failures.get(key, 0) > 0
+                    if failing:
+                        stub.failures[key] -= 1
+                if failing:
+                    return self.reply(503, {'errorMessages': ['Service unavailable']})
+                return self.reply(200, {
+                    'id': key, 'key': key, 'self': f'{stub.url}/rest/api/2/issue/{key}',
+                    'fields': {'updated': stub.updated.get(key, DEFAULT_UPDATED), 'attachment': [{
+                        'id': key, 'filename': 'slots.xlsx', 'size': len(stub.workbook),
+                        'created': '2026-10-17T10:00:00.000+0000',
+                        'self': f'{stub.url}/rest/api/2/attachment/{key}',
+                        'content': f'{stub.url}/secure/attachment/{key}/slots.xlsx',
+                    }]},
+                })
+            if method == 'GET' and self.path.startswith('/secure/attachment/'):
+                return self.reply(200, stub.workbook, 'application/octet-stream')
+            match = COMMENT_PATH.match(self.path)
+            if method == 'POST' and match:
+                created = jira_now()
+                with stub.lock:
+                    comments = stub.comments.setdefault(match.group(1), [])
+                    comments.append(json.loads(body)['body'])
+                    comment_id = sum(len(bodies) for bodies in stub.comments.values())
+                    # Like JIRA, a comment makes the issue show up as updated
+                    stub.updated[match.group(1)] = created
+                return self.reply(201, {'id': str(comment_id), 'self': f'{stub.url}/rest/api/2/comment/{comment_id}',
+                                        'body': comments[-1], 'created': created, 'updated': created})
+            return self.reply(404, {'errorMessages': [f'No stub for {method} {self.path}']})
+        finally:
+            self.finished()
+
+    def search(self, params):
+        # Understands only the 'updated >= "yyyy/MM/dd HH:mm"' clause the watcher adds,
+        # read in this machine's timezone as JIRA would read it in the user's
+        stub = self.server
+        match = JQL_SINCE.search(params.get('jql', [''])[0])
+        since = datetime.strptime(match.group(1), '%Y/%m/%d %H:%M').astimezone() if match else None
+        with stub.lock:
+            issues = sorted((updated, key) for key, updated in stub.updated.items()
+                            if since is None or datetime.strptime(updated, '%Y-%m-%dT%H:%M:%S.%f%z') >= since)
+        return {'startAt': 0, 'maxResults': len(issues), 'total': len(issues), 'issues': [
+            {'id': key, 'key': key, 'self': f'{stub.url}/rest/api/2/issue/{key}', 'fields': {'updated': updated}}
+            for updated, key in issues]}
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+def run(stub, jira, tickets, io_workers, **ticket_options):
+    from fifth import process_jira_tickets
+    stub.reset()
+    keys = [f'SLOT-{i}' for i in range(tickets)]
+    start = perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        failed = process_jira_tickets(jira, keys, io_workers=io_workers, parse_workers=2, **ticket_options)
+    elapsed = perf_counter() - start
+    duplicates = sum(len(bodies) - len(set(bodies)) for bodies in stub.comments.values())
+    return (f"{tickets / elapsed:6.1f} tickets/sec, {stub.requests} requests ({stub.injected} injected errors), "
+            f"max {stub.max_in_flight} in flight, {stub.resets} connection resets, {len(failed)} failed, {duplicates} duplicate comments")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exercise the JIRA client against a faulty local stub.")
+    parser.add_argument('--tickets', type=int, default=100)
+    parser.add_argument('--io-workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--rate', type=float, default=20.0, help="slot_jira request rate limit per second")
+    args = parser.parse_args(argv)
+
+    from jira import JIRA
+    from slot_jira import connect
+
+    stub = StubJira(args.latency, args.error_rate, make_workbook(5, 'row1', 0.2, 'HH'))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    try:
+        plain = JIRA(options={'server': stub.url}, basic_auth=('user', 'password'))
+        print(f"{'plain JIRA client':20s}", run(stub, plain, args.tickets, args.io_workers))
+        pooled = connect(stub.url, basic_auth=('user', 'password'), rate=args.rate)
+        print(f"{'slot_jira session':20s}", run(stub, pooled, args.tickets, args.io_workers, retries=0))
+    finally:
+        stub.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import os
+import sys
+import tracemalloc
+from io import BytesIO
+from time import perf_counter
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from slot_loader import read_sheet_rows
+
+def make_workbook_bytes(rows, extra_columns=20):
+    # A regular (not write-only) workbook, so the sheet carries a <dimension> element
+    # like files saved by Excel do
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Weekday slot request'])
+    sheet.append([])
+    sheet.append(['MIPS', 'Date', 'Start Time', 'End time', 'Project Name'] + [f'Notes {i}' for i in range(extra_columns)])
+    for i in range(rows):
+        sheet.append([100.0 + i, '2024-05-06', 9, 17, 'Project X'] + [f'note {i}'] * extra_columns)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def full_load(data):
+    # What the validators did before: build the whole workbook, then read rows 3 to 8
+    workbook = openpyxl.load_workbook(BytesIO(data))
+    sheet = workbook.active
+    header = [cell.value for cell in sheet[3]]
+    rows = [[cell.value for cell in sheet[row_index]] for row_index in range(4, 9)]
+    return header, rows, sheet.max_row
+
+def streaming_load(data):
+    return read_sheet_rows(BytesIO(data), header_row=3, first_row=4, last_row=8)
+
+def measure(func, data, repeat=3):
+    elapsed = None
+    for _ in range(repeat):
+        start = perf_counter()
+        func(data)
+        seconds = perf_counter() - start
+        elapsed = seconds if elapsed is None else min(elapsed, seconds)
+    # Separate pass for memory, so tracemalloc overhead does not skew the timings
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 10000, 50000]
+    for rows in sizes:
+        data = make_workbook_bytes(rows)
+        print(f"{rows} rows ({len(data) / 1024:.0f} KiB):")
+        for name, func in (('full load_workbook', full_load), ('read_sheet_rows', streaming_load)):
+            elapsed, peak = measure(func, data)
+            print(f"  {name:20s} {elapsed * 1000:10.1f} ms  peak {peak / 1024 / 1024:8.2f} MiB")
@@ -0,0 +1,96 @@
+import io
+import os
+import sys
+from datetime import datetime, time
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from slot_schema import Column, Schema, number, iso_date, hour_of_day, text
+from slot_timeparse import parse_hour
+import slot_columnar
+from slot_result import print_result
+
+MANDATORY_COLUMNS = ['MIPS', 'Date', 'Start Time', 'End time', 'Project Name']
+
+schema = Schema(
+    [
+        Column('MIPS', number()),
+        Column('Date', iso_date()),
+        Column('Start Time', hour_of_day()),
+        Column('End time', hour_of_day()),
+        Column('Project Name', text()),
+    ],
+    header_row=3, first_row=4, ignore_case=True, column_order='schema', skip_empty_rows=True, blank_is_empty=True,
+)
+
+def legacy_validate_rows(header, rows, emit):
+    # The per-cell if/elif chain from FinalValidation1.py, with printing replaced by emit
+    header_row_lower = [value.strip().lower() if value else '' for value in header]
+    column_indices = {name: index for index, name in enumerate(header_row_lower) if name}
+    errors_found = False
+    for row_index, row_values in rows:
+        if all(
+            row_values[column_indices[col_name.lower()]] is None or
+            (isinstance(row_values[column_indices[col_name.lower()]], str) and row_values[column_indices[col_name.lower()]].strip() == '')
+            for col_name in MANDATORY_COLUMNS
+        ):
+            continue
+        for col_name in MANDATORY_COLUMNS:
+            value = row_values[column_indices[col_name.lower()]]
+            if value is None or (isinstance(value, str) and value.strip() == ''):
+                emit(f"Error in row {row_index}: {col_name} is empty.")
+                errors_found = True
+                continue
+            if col_name == 'MIPS':
+                try:
+                    float(value)
+                except ValueError:
+                    emit(f"Error in row {row_index}: MIPS '{value}' is not a valid number.")
+                    errors_found = True
+            elif col_name == 'Date':
+                if not isinstance(value, datetime):
+                    try:
+                        datetime.strptime(str(value), '%Y-%m-%d')
+                    except ValueError:
+                        emit(f"Error in row {row_index}: Invalid date format '{value}'. Use YYYY-MM-DD.")
+                        errors_found = True
+            elif col_name in ['Start Time', 'End time']:
+                if parse_hour(value) is None:
+                    emit(f"Error in row {row_index}: Invalid time format '{value}' for {col_name}. Use whole numbers from 0 to 23.")
+                    errors_found = True
+            elif col_name == 'Project Name':
+                if not isinstance(value, str) or value.strip() == '':
+                    emit(f"Error in row {row_index}: Project Name '{value}' is not a valid string.")
+                    errors_found = True
+    return not errors_found
+
+def make_rows(count):
+    header = ('MIPS', 'Date', 'Start Time', 'End time', 'Project Name', 'Notes')
+    samples = [
+        (120.5, datetime(2024, 5, 6), 9, 17, 'Project X', None),
+        ('250', '2024-05-07', '8', time(18, 0), 'Project Y', 'late'),
+        ('abc', '2024-13-01', '25', None, 42, None),
+    ]
+    return header, [(4 + i, samples[i % len(samples)]) for i in range(count)]
+
+def per_row(func, header, rows):
+    start = perf_counter()
+    func(header, rows)
+    return (perf_counter() - start) / len(rows) * 1e6
+
+def render(result):
+    # Console sink into a buffer, so terminal speed does not skew the numbers
+    print_result(result, file=io.StringIO())
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    header, rows = make_rows(count)
+    print(f"{count} rows, us/row:")
+    for name, func in (
+        ('legacy if/elif chain, with output', lambda header, rows: legacy_validate_rows(header, rows, io.StringIO().write)),
+        ('Schema.check_rows', schema.check_rows),
+        ('Schema.check_rows, with output', lambda header, rows: render(schema.check_rows(header, rows))),
+        ('columnar check_rows', lambda header, rows: slot_columnar.check_rows(schema, header, rows)),
+        ('columnar check_rows, with output', lambda header, rows: render(slot_columnar.check_rows(schema, header, rows))),
+    ):
+        print(f"  {name:36s} {per_row(func, header, rows):7.2f}")
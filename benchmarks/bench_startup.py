@@ -0,0 +1,77 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter, sleep
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_workbooks import make_workbook
+
+# Start-up cost of short-lived validator runs: bare interpreter, importing each script,
+# a one-shot validation in a fresh process, and the same validation sent to a resident
+# slot_server. Pass --repo to measure another checkout (e.g. a git worktree of an older
+# commit) for a before/after comparison; the resident rows need slot_server.py there.
+
+MODULES = ['FinalValidation', 'FinalValidation1', 'Fourth', 'fifth', 'slot_watcher', 'validate_slots']
+
+def median_ms(command, repo, repeat):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        subprocess.run(command, cwd=repo, check=True, stdout=subprocess.DEVNULL)
+        times.append(perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure validator start-up time.")
+    parser.add_argument('--repo', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--repeat', type=int, default=9)
+    parser.add_argument('--port', type=int, default=8799)
+    args = parser.parse_args(argv)
+    repo = os.path.abspath(args.repo)
+
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as f:
+        f.write(make_workbook(5, 'row3', 0.0, 'HH'))
+        path = f.name
+    try:
+        print(f"{'bare interpreter':45s} {median_ms(python('pass'), repo, args.repeat):8.1f} ms")
+        for module in MODULES:
+            print(f"{'import ' + module:45s} {median_ms(python(f'import {module}'), repo, args.repeat):8.1f} ms")
+        one_shot = python(f"import FinalValidation1; FinalValidation1.schema.check({path!r})")
+        print(f"{'one-shot validation, fresh process':45s} {median_ms(one_shot, repo, args.repeat):8.1f} ms")
+
+        if not os.path.exists(os.path.join(repo, 'slot_server.py')):
+            return 0
+        server = subprocess.Popen([sys.executable, 'slot_server.py', '--port', str(args.port), 'serve', '--no-jira'],
+                                  cwd=repo, stdout=subprocess.DEVNULL)
+        try:
+            sys.path.insert(0, repo)
+            from slot_server import submit
+            for _ in range(100):
+                try:
+                    submit({'job': 'ping'}, args.port)
+                    break
+                except OSError:
+                    sleep(0.1)
+            client = [sys.executable, 'slot_server.py', '--port', str(args.port), 'validate', path]
+            print(f"{'resident validation, client process':45s} {median_ms(client, repo, args.repeat):8.1f} ms")
+            times = []
+            for _ in range(args.repeat):
+                start = perf_counter()
+                submit({'job': 'validate', 'layout': 'FinalValidation1', 'path': path}, args.port)
+                times.append(perf_counter() - start)
+            print(f"{'resident validation, in-process submit()':45s} {statistics.median(times) * 1000:8.1f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        os.unlink(path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
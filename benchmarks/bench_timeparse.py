@@ -0,0 +1,72 @@
+import os
+import random
+import re
+import sys
+from datetime import datetime, time
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from slot_timeparse import parse_hour, parse_clock_time, parse_iso_date
+
+# The per-cell parsing code the validators used before slot_timeparse
+
+def legacy_parse_time(value):
+    if isinstance(value, (datetime, time)):
+        return value.time() if isinstance(value, datetime) else value
+    if isinstance(value, (int, float)):
+        hours = int(value)
+        return time(hours, 0) if 0 <= hours <= 23 else None
+    if isinstance(value, str):
+        try:
+            hours = int(value.strip())
+            return time(hours, 0) if 0 <= hours <= 23 else None
+        except ValueError:
+            return None
+    return None
+
+def legacy_clock_time(value):
+    cleaned_value = value.strip().upper().replace('BST', '').strip()
+    if re.match(r'^(\d{1,2}(:\d{2})?|\d{3,4})$', cleaned_value):
+        try:
+            if ':' in cleaned_value:
+                datetime.strptime(cleaned_value, '%H:%M')
+            elif len(cleaned_value) <= 2:
+                datetime.strptime(cleaned_value, '%H')
+            else:
+                hours = int(cleaned_value[:-2])
+                minutes = int(cleaned_value[-2:])
+                if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+                    raise ValueError
+            return True
+        except ValueError:
+            return False
+    return False
+
+def legacy_date(value):
+    try:
+        datetime.strptime(str(value), '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+def timeit(func, values):
+    start = perf_counter()
+    for value in values:
+        func(value)
+    return (perf_counter() - start) / len(values) * 1e9
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(7)
+    hours = [random.choice(['9', '17', ' 8 ', 14, 23.0, 'x', '25']) for _ in range(count)]
+    clocks = [random.choice(['09', '17 BST', '09:30', '0930', '14bst', '2460', '7']) for _ in range(count)]
+    dates = [random.choice(['2024-05-06', '2024-5-7', '2024-13-01', '06/05/2024']) for _ in range(count)]
+    unique_clocks = [f'{h:02d}{m:02d} BST' for h in range(24) for m in range(60)]
+    print(f"{count} cells, ns per cell:")
+    for name, old, new, values in (
+        ('hour (FinalValidation)', legacy_parse_time, parse_hour, hours),
+        ('clock time (Fourth)', legacy_clock_time, parse_clock_time, clocks),
+        ('clock time, all distinct', legacy_clock_time, parse_clock_time, unique_clocks),
+        ('ISO date', legacy_date, parse_iso_date, dates),
+    ):
+        print(f"  {name:26s} legacy {timeit(old, values):8.0f}   slot_timeparse {timeit(new, values):8.0f}")
@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+from io import BytesIO
+import openpyxl
+
+# Synthetic slot-request workbooks for the benchmarks.
+#
+#   layout       'row1': headers on row 1 as Fourth.py/fifth.py expect
+#                'row3': two title rows, headers on row 3 as FinalValidation*.py expect
+#   error_rate   fraction of data rows with one bad or blank mandatory cell
+#   time_format  'HH' ('09'), 'HHMM' ('0930'), 'HH:MM' ('09:30'), 'BST' ('14 BST'),
+#                'int' (14) or 'mixed'
+
+HEADERS = {
+    'row1': ['MIPS', 'date', 'start time', 'end time'],
+    'row3': ['MIPS', 'Date', 'Start Time', 'End time', 'Project Name'],
+}
+TIME_FORMATS = ['HH', 'HHMM', 'HH:MM', 'BST', 'int']
+BAD_VALUES = {0: 'abc', 1: '2024-13-45', 2: '25', 3: '7pm', 4: ''}
+
+def format_time(hour, minute, time_format, rng):
+    if time_format == 'mixed':
+        time_format = rng.choice(TIME_FORMATS)
+    if time_format == 'HH':
+        return f'{hour:02d}'
+    if time_format == 'HHMM':
+        return f'{hour:02d}{minute:02d}'
+    if time_format == 'HH:MM':
+        return f'{hour:02d}:{minute:02d}'
+    if time_format == 'BST':
+        return f'{hour} BST'
+    return hour
+
+def make_rows(rows, layout='row3', error_rate=0.0, time_format='HH', seed=0):
+    rng = random.Random(seed)
+    width = len(HEADERS[layout])
+    for i in range(rows):
+        start = rng.randint(0, 20)
+        end = rng.randint(start + 1, 23)
+        minute = 30 if time_format in ('HHMM', 'HH:MM') and rng.random() < 0.5 else 0
+        row = [
+            round(rng.uniform(50, 2000), 1),
+            f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            format_time(start, minute, time_format, rng),
+            format_time(end, minute, time_format, rng),
+            f'Project {rng.choice("ABCDEFGH")}',
+        ][:width]
+        if rng.random() < error_rate:
+            column = rng.randrange(width)
+            row[column] = BAD_VALUES[column] or None
+        yield row
+
+def make_workbook(rows, layout='row3', error_rate=0.0, time_format='HH', seed=0):
+    # Returns the .xlsx bytes. A regular (not write-only) workbook is used so the sheet
+    # carries a <dimension> element like files saved by Excel.
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    if layout == 'row3':
+        sheet.append(['Weekday slot request'])
+        sheet.append([])
+    sheet.append(HEADERS[layout] + ['Notes'])
+    for row in make_rows(rows, layout, error_rate, time_format, seed):
+        sheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write synthetic slot-request workbooks.")
+    parser.add_argument('directory')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=5)
+    parser.add_argument('--layout', choices=sorted(HEADERS), default='row3')
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--time-format', choices=TIME_FORMATS + ['mixed'], default='mixed')
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for i in range(args.count):
+        path = os.path.join(args.directory, f'slot_request_{i:04d}.xlsx')
+        with open(path, 'wb') as f:
+            f.write(make_workbook(args.rows, args.layout, args.error_rate, args.time_format, seed=i))
+    print(f"Wrote {args.count} workbooks to {args.directory}")
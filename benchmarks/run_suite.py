@@ -0,0 +1,141 @@
+import argparse
+import importlib
+import io
+import json
+import os
+import sys
+import tracemalloc
+from io import BytesIO
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_workbooks import make_workbook
+from slot_loader import read_sheet_rows
+from slot_result import print_result
+import slot_columnar
+
+# Benchmark suite: times the load, validate and report phases of every validator variant
+# on synthetic workbooks, tracks peak memory, and compares against a saved baseline.
+#
+#   python benchmarks/run_suite.py --save benchmarks/results/baseline.json
+#   python benchmarks/run_suite.py --compare benchmarks/results/baseline.json
+#
+# The load phase reads the whole data extent (the 5-row limit of Fourth/fifth and the
+# last_row of FinalValidation/FinalValidation1 are ignored here) so larger sheets exercise
+# the validation loop of every variant.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# (name, layout module, columnar mode)
+VARIANTS = [
+    ('FinalValidation', 'FinalValidation', False),
+    ('FinalValidation1', 'FinalValidation1', False),
+    ('FinalValidation1-columnar', 'FinalValidation1', True),
+    ('Fourth', 'Fourth', False),
+    ('Fourth-columnar', 'Fourth', True),
+    ('fifth', 'fifth', False),
+]
+HEADER_LAYOUT = {'FinalValidation': 'row3', 'FinalValidation1': 'row3', 'Fourth': 'row1', 'fifth': 'row1'}
+TIME_FORMATS = {'row3': ['HH', 'mixed'], 'row1': ['HH', 'HHMM', 'BST']}
+
+_workbooks = {}
+
+def workbook(rows, layout, error_rate, time_format):
+    key = (rows, layout, error_rate, time_format)
+    if key not in _workbooks:
+        _workbooks[key] = make_workbook(rows, layout, error_rate, time_format)
+    return _workbooks[key]
+
+def run_phases(schema, columnar, data):
+    timings = {}
+    start = perf_counter()
+    header, rows, _ = read_sheet_rows(BytesIO(data), schema.header_row, schema.first_row, None)
+    timings['load'] = perf_counter() - start
+
+    start = perf_counter()
+    if columnar:
+        result = slot_columnar.check_rows(schema, header, rows)
+    else:
+        result = schema.check_rows(header, rows)
+    timings['validate'] = perf_counter() - start
+
+    start = perf_counter()
+    print_result(result, file=io.StringIO())
+    timings['report'] = perf_counter() - start
+    return timings, len(rows)
+
+def measure(schema, columnar, data, repeat):
+    best = None
+    for _ in range(repeat):
+        timings, rows_read = run_phases(schema, columnar, data)
+        best = timings if best is None else {phase: min(best[phase], timings[phase]) for phase in best}
+    # Separate pass for memory, so tracemalloc overhead does not skew the timings
+    tracemalloc.start()
+    run_phases(schema, columnar, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    record = {f'{phase}_ms': round(seconds * 1000, 3) for phase, seconds in best.items()}
+    record['rows_read'] = rows_read
+    record['peak_kib'] = round(peak / 1024, 1)
+    return record
+
+def run_suite(row_counts, error_rates, repeat, variants):
+    results = {}
+    for name, module, columnar in VARIANTS:
+        if variants and name not in variants:
+            continue
+        schema = importlib.import_module(module).schema
+        layout = HEADER_LAYOUT[module]
+        for rows in row_counts:
+            for error_rate in error_rates:
+                for time_format in TIME_FORMATS[layout]:
+                    case = f'{name}/{layout}/rows={rows}/errors={error_rate}/time={time_format}'
+                    data = workbook(rows, layout, error_rate, time_format)
+                    results[case] = measure(schema, columnar, data, repeat)
+                    record = results[case]
+                    print(f"{case:70s} load {record['load_ms']:9.2f} ms  validate {record['validate_ms']:9.2f} ms  "
+                          f"report {record['report_ms']:8.2f} ms  peak {record['peak_kib']:9.1f} KiB")
+    return results
+
+def compare(results, baseline, threshold):
+    # Returns the number of regressions: a phase slower than baseline by more than threshold
+    regressions = 0
+    for case, record in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric in ('load_ms', 'validate_ms', 'report_ms', 'peak_kib'):
+            if old.get(metric) and record[metric] > old[metric] * (1 + threshold) and record[metric] - old[metric] > 0.5:
+                print(f"REGRESSION {case} {metric}: {old[metric]} -> {record[metric]} "
+                      f"({record[metric] / old[metric]:.2f}x)")
+                regressions += 1
+    print(f"{regressions} regressions against baseline (threshold {threshold:.0%}).")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the slot validation benchmark suite.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[5, 1000, 10000])
+    parser.add_argument('--error-rates', type=float, nargs='+', default=[0.0, 0.1])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--variant', action='append', help="only run the named variant(s)")
+    parser.add_argument('--save', default=os.path.join(RESULTS_DIR, 'latest.json'),
+                        help="where to write the results (default: benchmarks/results/latest.json)")
+    parser.add_argument('--compare', help="baseline results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.rows, args.error_rates, args.repeat, args.variant)
+    os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+    with open(args.save, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print(f"Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
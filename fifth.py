@@ -1,154 +1,441 @@
-import openpyxl
-from datetime import datetime, time
-import os
-import re
-from jira import JIRA
-import tempfile
-
-def validate_excel_file(file_path, jira, issue):
-    workbook = openpyxl.load_workbook(file_path)
-    sheet = workbook.active
-
-    if sheet.max_row > 6:
-        comment = "Error: The sheet has more than 5 data rows."
-        jira.add_comment(issue, comment)
-        print(comment)
-        return
-
-    mandatory_columns = {
-        'MIPS': float,
-        'date': (str, datetime),
-        'start time': (str, time, datetime),
-        'end time': (str, time, datetime)
-    }
-
-    column_indices = {}
-    for col in sheet[1]:
-        if col.value in mandatory_columns:
-            column_indices[col.value] = col.column
-
-    if len(column_indices) != len(mandatory_columns):
-        comment = "Error: Not all mandatory columns are present in the sheet."
-        jira.add_comment(issue, comment)
-        print(comment)
-        return
-
-    errors_found = False
-
-    for row_index, row in enumerate(sheet.iter_rows(min_row=2, max_row=sheet.max_row, values_only=True), start=2):
-        for col_name, col_index in column_indices.items():
-            value = row[col_index - 1]
-            
-            if value is None:
-                comment = f"Error in row {row_index}: {col_name} is empty."
-                jira.add_comment(issue, comment)
-                print(comment)
-                errors_found = True
-                continue
+from time import sleep, perf_counter
+from io import BytesIO
+from slot_result import ValidationResult, REJECTED, print_result
+from slot_schema import Column, Schema, number, iso_date, clock_time
+from slot_cache import AttachmentCache
+from slot_schedule import SlotSchedule, slot_from_dict
+from slot_metrics import metrics, timed, recorded_call
+import slot_incremental
+import slot_prescreen
 
-            if col_name == 'MIPS':
-                try:
-                    float(value)
-                except ValueError:
-                    comment = f"Error in row {row_index}: MIPS '{value}' is not a valid number."
-                    jira.add_comment(issue, comment)
-                    print(comment)
-                    errors_found = True
-
-            elif col_name == 'date':
-                if isinstance(value, datetime):
-                    pass
-                elif isinstance(value, str):
-                    try:
-                        datetime.strptime(value, '%Y-%m-%d')
-                    except ValueError:
-                        comment = f"Error in row {row_index}: Invalid date format '{value}'. Use YYYY-MM-DD."
-                        jira.add_comment(issue, comment)
-                        print(comment)
-                        errors_found = True
-                else:
-                    comment = f"Error in row {row_index}: Date '{value}' is neither a string nor a datetime object."
-                    jira.add_comment(issue, comment)
-                    print(comment)
-                    errors_found = True
-
-            elif col_name in ['start time', 'end time']:
-                if isinstance(value, (datetime, time)):
-                    pass
-                elif isinstance(value, str):
-                    cleaned_value = value.strip().upper().replace('BST', '').strip()
-                    if re.match(r'^(\d{1,2}(:\d{2})?|\d{3,4})$', cleaned_value):
-                        try:
-                            if ':' in cleaned_value:
-                                datetime.strptime(cleaned_value, '%H:%M')
-                            else:
-                                if len(cleaned_value) <= 2:
-                                    datetime.strptime(cleaned_value, '%H')
-                                else:
-                                    hours = int(cleaned_value[:-2])
-                                    minutes = int(cleaned_value[-2:])
-                                    if 0 <= hours <= 23 and 0 <= minutes <= 59:
-                                        time(hours, minutes)
-                                    else:
-                                        raise ValueError
-                        except ValueError:
-                            comment = f"Error in row {row_index}: Invalid time format '{value}' for {col_name}. Use HH, HH:MM, or HHMM (24-hour format), optionally followed by BST."
-                            jira.add_comment(issue, comment)
-                            print(comment)
-                            errors_found = True
-                    else:
-                        comment = f"Error in row {row_index}: Invalid time format '{value}' for {col_name}. Use HH, HH:MM, or HHMM (24-hour format), optionally followed by BST."
-                        jira.add_comment(issue, comment)
-                        print(comment)
-                        errors_found = True
-                else:
-                    comment = f"Error in row {row_index}: {col_name} '{value}' is not a valid time format."
-                    jira.add_comment(issue, comment)
-                    print(comment)
-                    errors_found = True
-
-    if not errors_found:
-        comment = "Validation complete. No errors found."
-        jira.add_comment(issue, comment)
-        print(comment)
-    else:
-        comment = "Validation complete. Errors were found. Please check the comments above for details."
-        jira.add_comment(issue, comment)
-        print(comment)
-
-def process_jira_ticket(jira, issue_key):
-    issue = jira.issue(issue_key)
-    
-    # Find the Excel attachment
-    excel_attachment = None
-    for attachment in issue.fields.attachment:
-        if attachment.filename.endswith('.xlsx'):
-            excel_attachment = attachment
-            break
-    
-    if not excel_attachment:
-        comment = "Error: No Excel file found in the ticket attachments."
-        jira.add_comment(issue, comment)
-        print(comment)
-        return
+# Same layout as Fourth.py: headers on row 1, at most 5 data rows from row 2
+schema = Schema(
+    [
+        Column('MIPS', number()),
+        Column('date', iso_date(strict_types=True)),
+        Column('start time', clock_time()),
+        Column('end time', clock_time()),
+    ],
+    header_row=1, first_row=2, max_data_rows=5,
+    error_message="Validation complete. Errors were found. Please check the comments above for details.",
+)
+
+# Overlap and capacity messages posted per ticket; the closing line gives the total
+MAX_CONFLICT_MESSAGES = 20
+
+class CommentReport:
+    # Collects validation messages and posts them to the ticket as a few consolidated
+    # comments instead of one comment per failing cell.
+    def __init__(self, jira, issue, max_messages=None, max_chars=32000, retries=3, backoff=1.0):
+        self.jira = jira
+        self.issue = issue
+        self.max_messages = max_messages  # flush after this many messages (None = only at the end)
+        self.max_chars = max_chars  # JIRA rejects comment bodies above 32767 characters
+        self.retries = retries
+        self.backoff = backoff
+        self.messages = []
+        self.posted = []  # comment bodies posted to the ticket
+        self.comments_posted = 0
+        self.last_posted_at = None  # JIRA 'created' timestamp of the last comment posted
+
+    def add(self, message):
+        self.messages.append(message)
+        if self.max_messages and len(self.messages) >= self.max_messages:
+            self.flush()
+
+    def add_result(self, result):
+        # JIRA sink for a finished slot_result.ValidationResult
+        for message in result.messages():
+            self.add(message)
+
+    def flush(self):
+        # Each chunk leaves self.messages as soon as it is posted, so flushing again after
+        # a failure only posts what is still outstanding
+        while self.messages:
+            count = 0
+            chunk_len = 0
+            for message in self.messages:
+                if count and chunk_len + len(message) + 1 > self.max_chars:
+                    break
+                count += 1
+                chunk_len += len(message) + 1
+            self._post('\n'.join(self.messages[:count]))
+            del self.messages[:count]
+
+    def _post(self, body):
+        # Adding a comment is not idempotent: a timeout or dropped connection may come after
+        # JIRA stored it. Only retry when it certainly did not: 429/503 responses, or the
+        # connection was never made.
+        for attempt in range(self.retries + 1):
+            try:
+                with metrics.span('add_comment'):
+                    comment = self.jira.add_comment(self.issue, body)
+                self.posted.append(body)
+                self.last_posted_at = getattr(comment, 'created', None)
+                self.comments_posted += 1
+                metrics.count('comments_posted')
+                return
+            except (jira_error(), OSError) as e:
+                status = getattr(e, 'status_code', None)
+                retryable = status in RETRY_POST_STATUSES if status is not None else not_connected(e)
+                if not retryable or attempt == self.retries:
+                    raise
+                # Exponential backoff: backoff, 2*backoff, 4*backoff, ...
+                metrics.count('comment_retries')
+                sleep(self.backoff * 2 ** attempt)
+
+# Statuses where JIRA did not act on a POST, as in slot_jira
+RETRY_POST_STATUSES = {429, 503}
+
+def jira_error():
+    # The jira package is only imported once a JIRA call has actually failed; importing
+    # it up front would double the start-up time of every script that imports this module
+    from jira.exceptions import JIRAError
+    return JIRAError
+
+def not_connected(error):
+    # True when the request never left this machine: connection refused, DNS failure or
+    # connect timeout. Read timeouts and dropped connections are not included.
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    from requests.exceptions import ConnectionError, ConnectTimeout
+    from urllib3.exceptions import ConnectTimeoutError  # NewConnectionError is a subclass
+    if isinstance(error, ConnectTimeout):
+        return True
+    if isinstance(error, ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), ConnectTimeoutError)
+    return False
+
+def open_workbook_source(source):
+    # Accepts a file path, a binary file-like object or the raw workbook bytes
+    # (bytes, bytearray or memoryview), so attachments never need to touch the disk.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+def download_attachment(attachment, stream_threshold=8 * 1024 * 1024, chunk_size=1024 * 1024):
+    # Small attachments are fetched in one request; large ones are streamed in chunks
+    # into a single growing buffer rather than being assembled by requests in full.
+    if getattr(attachment, 'size', 0) < stream_threshold:
+        return attachment.get()
+    data = bytearray()
+    for chunk in attachment.iter_content(chunk_size):
+        data += chunk
+    return data
+
+def validate_excel_file(source):
+    # Returns a slot_result.ValidationResult; output is left to the caller
+    return schema.check(open_workbook_source(source))
+
+def validate_workbook(source, histories=None, slot_source=None):
+    # Validates every sheet that has the mandatory columns. Returns
+    # [(sheet title, result, new_history, rows_rechecked, slots)]; histories maps sheet
+    # titles to the slot_incremental history of their previous run, so only changed rows
+    # are checked. With slot_source, rows whose End time is not after Start Time are
+    # reported like any other error, and passing sheets also carry their schedule slots.
+    return slot_incremental.check_workbook(schema, open_workbook_source(source), histories, slot_source)
+
+def load_schedule(cache=None, capacity=None):
+    # A SlotSchedule holding the slots of every ticket validated on earlier runs, so the
+    # overlap and capacity checks are not limited to the tickets of this run
+    schedule = SlotSchedule(capacity)
+    if cache is not None:
+        for issue_key, slots in cache.all_slots():
+            schedule.replace_source(issue_key, [slot_from_dict(values) for values in sum(slots.values(), [])])
+    return schedule
+
+def index_slots(schedule, cache, issue_key, filenames, validated):
+    # Re-indexes the ticket in the shared schedule. validated: {attachment filename: [Slot]}
+    # for every attachment validated in this run, with no slots when none of its sheets
+    # passed; the ticket's other attachments keep the slots stored by earlier runs.
+    # Returns the conflict messages, or nothing when the ticket only had to be put back
+    # (every attachment was a cache hit).
+    if not validated and schedule.has_source(issue_key):
+        return []
+    stored = (cache.get_slots(issue_key) if cache is not None else None) or {}
+    slots = {filename: [slot_from_dict(values) for values in stored_slots]
+             for filename, stored_slots in stored.items() if filename in filenames and filename not in validated}
+    slots.update((filename, file_slots) for filename, file_slots in validated.items() if file_slots)
+    messages = schedule.replace_source(issue_key, sum(slots.values(), []))
+    if not validated:
+        return []
+    if cache is not None:
+        cache.put_slots(issue_key, {filename: [slot.to_dict() for slot in file_slots]
+                                    for filename, file_slots in slots.items()})
+    return messages
+
+def run_on(pool, func, *args):
+    # Submits func to pool, or runs it right away when there is no pool; returns a future
+    from concurrent.futures import Future
+    if pool is not None:
+        return pool.submit(func, *args)
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def fetch_attachment(attachment, issue_key):
+    with metrics.span('download', ticket=issue_key):
+        data = download_attachment(attachment)
+    metrics.count('bytes_downloaded', len(data))
+    return data
+
+class AttachmentRun:
+    # One attachment's way through process_jira_ticket
+    __slots__ = ('attachment', 'download', 'data', 'sheets', 'slots', 'rejected', 'cacheable', 'skipped')
+
+    def __init__(self, attachment):
+        self.attachment = attachment
+        self.download = None  # future of the workbook bytes
+        self.data = None
+        self.sheets = []  # [(sheet title, result, history, new_history)]
+        self.slots = {}  # sheet title -> slot_schedule slots of the passing sheets
+        self.rejected = False
+        self.cacheable = True  # False after a download or parse failure, so the next sweep tries again
+        self.skipped = False  # the same bytes were already validated for the ticket
+
+    def reject(self, result, cacheable=True):
+        self.sheets = [(None, result, None, None)]
+        self.rejected = True
+        self.cacheable = cacheable
+
+@timed('ticket')
+def process_jira_ticket(jira, issue_key, parse_pool=None, parse_timeout=120, cache=None, schedule=None,
+                        download_pool=None, **report_options):
+    # Validates every .xlsx attachment of the ticket and every sheet in them that has the
+    # mandatory columns, and posts one merged report.
+    # cache: an optional slot_cache.AttachmentCache; attachments it has already seen are
+    # not downloaded, validated or commented on again, and a re-upload to the same ticket
+    # only re-checks changed rows and comments with what changed since the last run
+    # schedule: an optional slot_schedule.SlotSchedule shared by all tickets (see
+    # load_schedule); valid sheets are also checked for slot order, overlaps and capacity
+    # against it
+    # download_pool/parse_pool: thread and process pools shared by all tickets, so the
+    # attachments of one ticket are fetched and parsed concurrently within one budget
+    # Returns the ticket's CommentReport
+    start = perf_counter()
+    metrics.count('tickets')
+    with metrics.span('jira_issue', ticket=issue_key):
+        issue = jira.issue(issue_key)
+    report = CommentReport(jira, issue, **report_options)
     
-    # Download the attachment to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_file:
-        temp_file.write(excel_attachment.get())
-        temp_file_path = temp_file.name
+    # Find the Excel attachments
+    attachments = [attachment for attachment in issue.fields.attachment if attachment.filename.endswith('.xlsx')]
     
-    try:
-        validate_excel_file(temp_file_path, jira, issue)
-    finally:
-        # Clean up the temporary file
-        os.unlink(temp_file_path)
+    if not attachments:
+        message = "Error: No Excel file found in the ticket attachments."
+        print(message)
+        report.add(message)
+        report.flush()
+        return report
+
+    pending = []
+    for attachment in attachments:
+        if cache is not None and cache.get(attachment) is not None:
+            metrics.count('cache_hits')
+            print(f"{issue_key}: {attachment.filename} is unchanged since it was last validated.")
+        else:
+            pending.append(attachment)
+    if not pending:
+        if schedule is not None:
+            index_slots(schedule, cache, issue_key, {attachment.filename for attachment in attachments}, {})
+        return report
+
+    # {filename: {sheet title: history}} of the ticket's previous runs
+    histories = (cache.get_history(issue_key) if cache is not None else None) or {}
+
+    # Start every download at once; each workbook is screened and handed to the parse
+    # pool as soon as its own download is done
+    runs = [AttachmentRun(attachment) for attachment in pending]
+    for run in runs:
+        rejection = slot_prescreen.check_size(getattr(run.attachment, 'size', 0))
+        if rejection is not None:
+            metrics.count('prescreen_rejections')
+            run.reject(rejection)
+        else:
+            run.download = run_on(download_pool, fetch_attachment, run.attachment, issue_key)
+
+    parses = []
+    for run in runs:
+        if run.download is None:
+            continue
+        try:
+            run.data = run.download.result()
+        except Exception as e:
+            run.reject(ValidationResult(REJECTED, f"Error: {run.attachment.filename} could not be downloaded ({e!r})."),
+                       cacheable=False)
+            continue
+        if cache is not None:
+            if cache.get_by_content(run.attachment, issue_key, run.data) is not None:
+                metrics.count('cache_hits')
+                print(f"{issue_key}: {run.attachment.filename} was already validated under another upload.")
+                run.skipped = True
+                continue
+            metrics.count('cache_misses')
+        # Corrupt, protected or oversized workbooks and wrong headers are turned away
+        # in a millisecond or two, without the full openpyxl load
+        with metrics.span('prescreen', ticket=issue_key):
+            rejection = slot_prescreen.screen(run.data, schema)
+        if rejection is not None:
+            metrics.count('prescreen_rejections')
+            run.reject(rejection)
+            continue
+        job = (validate_workbook, run.data, histories.get(run.attachment.filename),
+               issue_key if schedule is not None else None)
+        if parse_pool is None:
+            parses.append((run, run_on(None, *job), False))
+        elif metrics.enabled:
+            # The worker records its own load/check timings and sends them back
+            parses.append((run, parse_pool.submit(recorded_call, *job), True))
+        else:
+            # openpyxl parsing is CPU bound, so it runs in a worker process
+            parses.append((run, parse_pool.submit(*job), False))
+
+    with metrics.span('validate', ticket=issue_key):
+        for run, future, recorded in parses:
+            sheet_histories = histories.get(run.attachment.filename) or {}
+            try:
+                outcome = future.result(timeout=parse_timeout)
+                if recorded:
+                    outcome, worker_metrics = outcome
+                    metrics.merge(worker_metrics)
+            except Exception as e:
+                run.reject(ValidationResult(REJECTED, f"Error: {run.attachment.filename} could not be validated ({e!r})."),
+                           cacheable=False)
+                continue
+            for title, result, new_history, rows_rechecked, slots in outcome:
+                metrics.count('rows_reused', result.rows_checked - rows_rechecked)
+                metrics.count('cells_validated', rows_rechecked * len(result.labels))
+                run.sheets.append((title, result, sheet_histories.get(title), new_history))
+                if slots is not None:
+                    run.slots[title] = slots
+    runs = [run for run in runs if not run.skipped]
+
+    # Render the finished results to the console and the ticket; a re-upload only gets
+    # the rows that changed. Several sheets get a heading each and a closing summary.
+    merged = sum(len(run.sheets) for run in runs) > 1
+    for run in runs:
+        for title, result, history, new_history in run.sheets:
+            if merged:
+                heading = f"{run.attachment.filename} / {title}:" if title is not None else f"{run.attachment.filename}:"
+                print(heading)
+                report.add(heading)
+            print_result(result)
+            if new_history is not None:
+                for message in slot_incremental.delta_messages(result, history, new_history):
+                    report.add(message)
+            else:
+                report.add_result(result)
+    if merged:
+        # Attachments turned away before their sheets were read are counted on their own
+        validated_runs = [run for run in runs if not run.rejected]
+        rejected = len(runs) - len(validated_runs)
+        results = [result for run in validated_runs for _, result, _, _ in run.sheets]
+        passed = sum(result.passed for result in results)
+        parts = []
+        if validated_runs:
+            parts.append(f"Validated {len(results)} {'sheet' if len(results) == 1 else 'sheets'} in "
+                         f"{len(validated_runs)} {'attachment' if len(validated_runs) == 1 else 'attachments'}: "
+                         f"{passed} passed, {len(results) - passed} with errors.")
+        if rejected:
+            parts.append(f"{rejected} {'attachment' if rejected == 1 else 'attachments'} could not be validated.")
+        message = ' '.join(parts)
+        print(message)
+        report.add(message)
+
+    if schedule is not None:
+        # Attachments that could not be downloaded or parsed keep the slots of their last run
+        validated = {run.attachment.filename: [] for run in runs if run.cacheable}
+        for run in runs:
+            for title, slots in run.slots.items():
+                for slot in slots:
+                    slot.sheet = f"{run.attachment.filename} / {title}" if merged else None
+                validated[run.attachment.filename].extend(slots)
+        conflicts = index_slots(schedule, cache, issue_key, {attachment.filename for attachment in attachments},
+                                validated)
+        if conflicts:
+            # Under their own closing line, and at most MAX_CONFLICT_MESSAGES of them
+            for message in conflicts[:MAX_CONFLICT_MESSAGES]:
+                print(message)
+                report.add(message)
+            listed = (f" The first {MAX_CONFLICT_MESSAGES} are listed above."
+                      if len(conflicts) > MAX_CONFLICT_MESSAGES else "")
+            message = (f"Schedule check complete. {len(conflicts)} "
+                       f"{'conflict' if len(conflicts) == 1 else 'conflicts'} with the slot schedule.{listed}")
+            print(message)
+            report.add(message)
+    report.flush()
+
+    if cache is not None:
+        # The attachments were fetched and parsed side by side, so each is credited with an
+        # equal share of the ticket's time rather than all of it
+        cost_seconds = (perf_counter() - start) / max(len(runs), 1)
+        for run in runs:
+            if not run.cacheable:
+                continue
+            messages = [message for _, result, _, _ in run.sheets for message in result.messages()]
+            cache.put(run.attachment, issue_key, run.data, all(result.passed for _, result, _, _ in run.sheets),
+                      messages, cost_seconds)
+            if not run.rejected:  # a rejected upload keeps the history of the last validated one
+                histories[run.attachment.filename] = {title: new_history for title, _, _, new_history in run.sheets
+                                                      if new_history is not None}
+        cache.put_history(issue_key, histories)
+    return report
+
+def process_jira_tickets(jira, issue_keys=None, jql=None, io_workers=8, parse_workers=None, download_workers=None,
+                         **ticket_options):
+    # Validates many tickets at once: JIRA fetch/comment calls run on a thread pool,
+    # attachment downloads on a second one shared by all tickets (a ticket waiting for its
+    # own downloads never holds the threads they need) and workbook parsing on a process
+    # pool. A failing ticket is reported and skipped without affecting the others. Returns
+    # the keys that failed.
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+    if jql is not None:
+        issue_keys = [issue.key for issue in jira.search_issues(jql, fields='key', maxResults=False)]
+
+    start = perf_counter()
+    failed = []
+    with ProcessPoolExecutor(parse_workers) as parse_pool, ThreadPoolExecutor(io_workers) as io_pool, \
+            ThreadPoolExecutor(download_workers or io_workers) as download_pool:
+        futures = {
+            io_pool.submit(process_jira_ticket, jira, issue_key, parse_pool,
+                           download_pool=download_pool, **ticket_options): issue_key
+            for issue_key in issue_keys
+        }
+        for future in as_completed(futures):
+            issue_key = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error processing {issue_key}: {e!r}")
+                failed.append(issue_key)
+
+    elapsed = perf_counter() - start
+    rate = len(issue_keys) / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {len(issue_keys)} tickets in {elapsed:.2f}s ({rate:.1f} tickets/sec), {len(failed)} failed.")
+    if ticket_options.get('cache') is not None:
+        print(ticket_options['cache'].summary())
+    if metrics.enabled:
+        print(metrics.summary())
+    return failed
+
+if __name__ == '__main__':
+    from slot_jira import connect
+
+    # JIRA connection details; the session pools connections, limits requests in flight
+    # and retries 429/5xx itself, so comment posts are not retried again on top
+    jira = connect('https://your-jira-instance.com', basic_auth=('your_username', 'your_password'))
 
-# JIRA connection details
-jira_options = {'server': 'https://your-jira-instance.com'}
-jira = JIRA(options=jira_options, basic_auth=('your_username', 'your_password'))
+    # Specify the JIRA ticket keys (or pass jql='project = PROJECT AND status = Open')
+    issue_keys = ['PROJECT-123']
 
-# Specify the JIRA ticket key
-issue_key = 'PROJECT-123'
+    # Optional stage timings: metrics.enable(trace_path='slot_trace.jsonl'), and for a
+    # single slow ticket slot_metrics.profile_call('PROJECT-123.prof', process_jira_ticket, jira, 'PROJECT-123')
 
-# Process the JIRA ticket
-process_jira_ticket(jira, issue_key)
\ No newline at end of file
+    # Process the JIRA tickets, skipping attachments validated on an earlier run and
+    # checking every valid slot against the ones requested by earlier tickets
+    # (load_schedule(cache, capacity=...) also enforces a MIPS limit per hour)
+    cache = AttachmentCache()
+    process_jira_tickets(jira, issue_keys, cache=cache, schedule=load_schedule(cache), retries=0)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from time import time as now
+
+# Persistent record of attachments that were already validated, so a periodic re-sweep
+# of open tickets can skip the download, the parse and the duplicate JIRA comments.
+#
+# Entries are keyed by attachment id plus a metadata fingerprint (size and created
+# timestamp, both known before downloading). The content hash is stored as well, so the
+# same workbook re-uploaded to the same ticket under a new attachment id is also a hit,
+# and is then recorded under that id too.
+
+# Bumped whenever a table changes; a cache file from another version is rebuilt empty
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attachments (
+    attachment_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    issue_key TEXT NOT NULL,
+    content_hash TEXT,
+    passed INTEGER NOT NULL,
+    messages TEXT NOT NULL,
+    cost_seconds REAL NOT NULL,
+    validated_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (attachment_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS attachments_by_hash ON attachments (issue_key, content_hash);
+CREATE INDEX IF NOT EXISTS attachments_by_use ON attachments (last_used);
+CREATE TABLE IF NOT EXISTS row_history (
+    issue_key TEXT PRIMARY KEY,
+    history TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ticket_slots (
+    issue_key TEXT PRIMARY KEY,
+    slots TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+def attachment_fingerprint(attachment):
+    return f"{getattr(attachment, 'size', '')}:{getattr(attachment, 'created', '')}"
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+class CacheEntry:
+    __slots__ = ('passed', 'messages', 'cost_seconds', 'validated_at')
+
+    def __init__(self, passed, messages, cost_seconds, validated_at):
+        self.passed = passed
+        self.messages = messages
+        self.cost_seconds = cost_seconds  # this attachment's share of the original run's time
+        self.validated_at = validated_at
+
+class AttachmentCache:
+    def __init__(self, path='slot_validation_cache.sqlite3', max_age_days=30, max_entries=10000, evict_every=100):
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self._puts = 0
+        self._lock = threading.Lock()
+        # Shared by the ticket worker threads; every access goes through _lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS attachments; DROP TABLE IF EXISTS row_history; "
+                                   "DROP TABLE IF EXISTS ticket_slots;")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+        self.evict()
+
+    def _row_to_entry(self, row):
+        passed, messages, cost_seconds, validated_at = row
+        return CacheEntry(bool(passed), json.loads(messages), cost_seconds, validated_at)
+
+    def _hit(self, where, params, saved=True):
+        row = self._db.execute(
+            f"SELECT passed, messages, cost_seconds, validated_at FROM attachments WHERE {where}",
+            params).fetchone()
+        if row is None:
+            return None
+        self._db.execute(f"UPDATE attachments SET last_used = ? WHERE {where}", (now(),) + params)
+        self._db.commit()
+        entry = self._row_to_entry(row)
+        self.hits += 1
+        if saved:
+            self.time_saved += entry.cost_seconds
+        return entry
+
+    def get(self, attachment):
+        # First lookup, before downloading
+        with self._lock:
+            return self._hit("attachment_id = ? AND fingerprint = ?",
+                             (str(attachment.id), attachment_fingerprint(attachment)))
+
+    def get_by_content(self, attachment, issue_key, data):
+        # Final lookup after downloading: the same bytes were already validated for this
+        # ticket (a re-upload). A hit is stored under the new attachment's id as well, so
+        # the next sweep finds it before downloading; the download has been paid for, so
+        # it adds nothing to time_saved. A miss here is what counts as a cache miss.
+        with self._lock:
+            digest = content_hash(data)
+            entry = self._hit("issue_key = ? AND content_hash = ?", (issue_key, digest), saved=False)
+            if entry is None:
+                self.misses += 1
+                return entry
+            self._db.execute(
+                "INSERT OR REPLACE INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(attachment.id), attachment_fingerprint(attachment), issue_key, digest, int(entry.passed),
+                 json.dumps(entry.messages), entry.cost_seconds, entry.validated_at, now()))
+            self._db.commit()
+            return entry
+
+    def put(self, attachment, issue_key, data, passed, messages, cost_seconds):
+        with self._lock:
+            timestamp = now()
+            self._db.execute(
+                "INSERT OR REPLACE INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(attachment.id), attachment_fingerprint(attachment), issue_key,
+                 content_hash(data) if data is not None else None, int(passed),
+                 json.dumps(messages), cost_seconds, timestamp, timestamp))
+            self._db.commit()
+            self._puts += 1
+            evict = self._puts % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def get_history(self, issue_key):
+        # Per-row fingerprints and errors of the ticket's last validation, as
+        # {attachment filename: {sheet title: history}}; see slot_incremental
+        with self._lock:
+            row = self._db.execute("SELECT history FROM row_history WHERE issue_key = ?", (issue_key,)).fetchone()
+            return json.loads(row[0]) if row is not None else None
+
+    def put_history(self, issue_key, history):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO row_history VALUES (?, ?, ?)",
+                             (issue_key, json.dumps(history, default=str), now()))
+            self._db.commit()
+
+    def get_slots(self, issue_key):
+        # The ticket's indexed slot_schedule slots as {attachment filename: [Slot.to_dict()]}
+        with self._lock:
+            row = self._db.execute("SELECT slots FROM ticket_slots WHERE issue_key = ?", (issue_key,)).fetchone()
+            return json.loads(row[0]) if row is not None else None
+
+    def put_slots(self, issue_key, slots):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO ticket_slots VALUES (?, ?, ?)",
+                             (issue_key, json.dumps(slots), now()))
+            self._db.commit()
+
+    def all_slots(self):
+        # [(issue_key, slots)] for every ticket, to rebuild the schedule on start-up
+        with self._lock:
+            return [(issue_key, json.loads(slots))
+                    for issue_key, slots in self._db.execute("SELECT issue_key, slots FROM ticket_slots")]
+
+    def evict(self):
+        # Drops entries unused for max_age_days, then the least recently used ones
+        # beyond max_entries
+        with self._lock:
+            if self.max_age_days is not None:
+                self._db.execute("DELETE FROM attachments WHERE last_used < ?",
+                                 (now() - self.max_age_days * 86400,))
+                self._db.execute("DELETE FROM row_history WHERE last_used < ?",
+                                 (now() - self.max_age_days * 86400,))
+                self._db.execute("DELETE FROM ticket_slots WHERE last_used < ?",
+                                 (now() - self.max_age_days * 86400,))
+            if self.max_entries is not None:
+                self._db.execute(
+                    "DELETE FROM attachments WHERE rowid NOT IN "
+                    "(SELECT rowid FROM attachments ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,))
+                self._db.execute(
+                    "DELETE FROM row_history WHERE rowid NOT IN "
+                    "(SELECT rowid FROM row_history ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,))
+                self._db.execute(
+                    "DELETE FROM ticket_slots WHERE rowid NOT IN "
+                    "(SELECT rowid FROM ticket_slots ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,))
+            self._db.commit()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (f"Attachment cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate():.0%} hit rate), {self.time_saved:.1f}s saved.")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,184 @@
+from datetime import datetime, time
+import numpy as np
+from slot_loader import read_sheet_rows
+from slot_metrics import metrics
+from slot_result import ValidationError, ValidationResult, EMPTY_CELL, EMPTY_CELL_TEMPLATE, TOO_MANY_ROWS
+
+# Columnar validation for large slot sheets. Each mandatory column is read into an
+# object array and checked in bulk; the result holds a per-row error code for every
+# column, which maps back to the same errors Schema.check_rows reports.
+#
+# Codes: 0 = valid, 1 = empty, 2 + n = templates[column][n]
+
+VALID = 0
+EMPTY = 1
+
+class ColumnarResult:
+    def __init__(self, columns, row_indices, codes, templates, values, skipped):
+        self.columns = columns  # Column objects in report order
+        self.row_indices = row_indices  # sheet row numbers
+        self.codes = codes  # int16 array, shape (len(columns), len(row_indices))
+        self.templates = templates  # per column, list of message templates
+        self.values = values  # per column, object array of cell values
+        self.skipped = skipped  # rows ignored because every mandatory cell is blank
+
+    def error_mask(self):
+        # True for every row with at least one error
+        return (self.codes != VALID).any(axis=0) & ~self.skipped
+
+    def column_mask(self, name):
+        for column, codes in zip(self.columns, self.codes):
+            if column.name == name:
+                return (codes != VALID) & ~self.skipped
+        raise KeyError(name)
+
+    def to_result(self, schema):
+        # Collects the failing cells into a ValidationResult, row by row in report order
+        templates = [EMPTY_CELL_TEMPLATE]
+        template_codes = {}
+        code_maps = np.zeros((len(self.columns), 2 + max(map(len, self.templates), default=0)), dtype=np.intp)
+        for n, column_templates in enumerate(self.templates):
+            code_maps[n, EMPTY] = EMPTY_CELL
+            for k, template in enumerate(column_templates):
+                if template not in template_codes:
+                    template_codes[template] = len(templates)
+                    templates.append(template)
+                code_maps[n, 2 + k] = template_codes[template]
+
+        # Row-major over (row, column) gives the order Schema.check_rows reports in
+        rows, columns = np.nonzero(((self.codes != VALID) & ~self.skipped).T)
+        values = np.empty(self.codes.shape, dtype=object)
+        for n, column_values in enumerate(self.values):
+            values[n] = column_values
+        errors = list(map(ValidationError, self.row_indices[rows].tolist(), columns.tolist(),
+                          code_maps[columns, self.codes[columns, rows]].tolist(), values[columns, rows].tolist()))
+
+        rows_checked = int((~self.skipped).sum())
+        return schema.finish([column.label for column in self.columns], templates, errors, rows_checked)
+
+def to_object_array(values):
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def cell_types(array):
+    return np.frompyfunc(type, 1, 1)(array)
+
+# Cell types a check always accepts, so those cells need no call at all
+VALID_TYPES = {
+    'number': (int, float, bool),
+    'iso_date': (datetime,),
+    'hour_of_day': (datetime, time),
+    'clock_time': (datetime, time),
+}
+
+def bulk_hour_of_day(array, cells):
+    # int and float cells: truncate and range-check at C level; returns the bad ones
+    hours = array[cells].astype(float)
+    bad = ~np.isfinite(hours)
+    hours[bad] = 0
+    bad |= (np.trunc(hours) < 0) | (np.trunc(hours) > 23)
+    return cells[bad]
+
+BULK_CHECKS = {
+    'hour_of_day': ((int, float), bulk_hour_of_day),
+}
+
+def factorize(values):
+    # (distinct, inverse) for cells of a single type: every distinct value once and each
+    # cell's index into it. A dict lookup per cell driven from np.fromiter; np.unique
+    # would sort the object array with Python comparisons and is slower here.
+    index = {}
+    inverse = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.intp,
+                          count=len(values))
+    return list(index), inverse
+
+def column_codes(array, check, blank_is_empty):
+    # Returns (codes, templates, blank) for one column. Cells are split by type: types the
+    # check always accepts are valid outright, numbers get the column's bulk check if it
+    # has one, and the rest are factorized, so the check runs once per distinct value.
+    # Slot sheets repeat the same dates, hours and project names heavily.
+    kind = getattr(check, 'kind', None)
+    codes = np.zeros(len(array), dtype=np.int16)
+    blank = np.zeros(len(array), dtype=bool)  # None or whitespace-only, for skip_empty_rows
+    templates = []
+    template_codes = {}
+
+    def code_of(template):
+        if template not in template_codes:
+            template_codes[template] = 2 + len(templates)
+            templates.append(template)
+        return template_codes[template]
+
+    types = cell_types(array)
+    valid_types = VALID_TYPES.get(kind, ())
+    bulk_types, bulk = BULK_CHECKS.get(kind, ((), None))
+    for cell_type in set(types.tolist()):
+        cells = np.flatnonzero(types == cell_type)
+        if cell_type is type(None):
+            codes[cells] = EMPTY
+            blank[cells] = True
+        elif cell_type in valid_types:
+            continue
+        elif cell_type in bulk_types:
+            bad = bulk(array, cells)
+            if len(bad):
+                codes[bad] = code_of(check(array[bad[0]]))
+        else:
+            distinct, inverse = factorize(array[cells].tolist())
+            distinct_codes = np.zeros(len(distinct), dtype=np.int16)
+            distinct_blank = np.zeros(len(distinct), dtype=bool)
+            for index, value in enumerate(distinct):
+                if cell_type is str and value.strip() == '':
+                    distinct_blank[index] = True
+                    if blank_is_empty:
+                        distinct_codes[index] = EMPTY
+                        continue
+                template = check(value)
+                if template is not None:
+                    distinct_codes[index] = code_of(template)
+            codes[cells] = distinct_codes[inverse]
+            blank[cells] = distinct_blank[inverse]
+    return codes, templates, blank
+
+def check_columns(schema, header, rows):
+    # Returns (ColumnarResult, missing_column_names)
+    resolved, missing = schema.resolve(header)
+    if missing:
+        return None, missing
+
+    row_indices = np.fromiter((row_index for row_index, _ in rows), dtype=np.int64, count=len(rows))
+    columns = []
+    codes = np.zeros((len(resolved), len(rows)), dtype=np.int16)
+    templates = []
+    values = []
+    all_blank = np.ones(len(rows), dtype=bool)
+
+    for n, (position, column) in enumerate(resolved):
+        array = to_object_array([row[position] for _, row in rows])
+        codes[n], column_templates, blank = column_codes(array, column.check, schema.blank_is_empty)
+        columns.append(column)
+        templates.append(column_templates)
+        values.append(array)
+        all_blank &= blank
+
+    skipped = all_blank if schema.skip_empty_rows else np.zeros(len(rows), dtype=bool)
+    return ColumnarResult(columns, row_indices, codes, templates, values, skipped), []
+
+def check_rows(schema, header, rows):
+    # Same result as schema.check_rows, computed column by column
+    result, missing = check_columns(schema, header, rows)
+    if missing:
+        return schema.missing_result(missing)
+    return result.to_result(schema)
+
+def check(schema, source, max_data_rows=None):
+    # The schema's row-count limit is a per-ticket business rule; bulk capacity-planning
+    # uploads read the whole sheet unless a limit is passed explicitly.
+    with metrics.span('load_workbook'):
+        header, rows, too_many_rows = read_sheet_rows(source, schema.header_row, schema.first_row,
+                                                      schema.last_row, max_data_rows)
+    if too_many_rows:
+        return ValidationResult(TOO_MANY_ROWS, f"Error: The sheet has more than {max_data_rows} data rows.")
+    with metrics.span('check_cells'):
+        return check_rows(schema, header, rows)
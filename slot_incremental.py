@@ -0,0 +1,130 @@
+import hashlib
+from slot_loader import read_workbook_rows
+from slot_metrics import metrics
+from slot_schema import is_blank
+from slot_schedule import slots_from_rows
+from slot_result import ValidationError, ValidationResult, EMPTY_CELL_TEMPLATE, ERRORS, PASSED, EMPTY_SHEET, TOO_MANY_ROWS
+
+# Row-level re-validation of re-uploaded workbooks. Each ticket keeps a history from its
+# last run: the resolved column labels plus, per sheet row, a fingerprint of the
+# mandatory-column values and the errors found in that row. On the next upload only rows
+# whose fingerprint changed are checked again; the others reuse their stored errors, and
+# the ticket gets a delta ("Row 3 fixed.", "Row 5 still invalid.") instead of every
+# message again.
+#
+# history = {'labels': [...], 'rows': {'<row>': [fingerprint, [[column, template, value], ...]]}}
+
+def row_fingerprint(values):
+    return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+def check_rows(schema, header, rows, history=None):
+    # Returns (result, new_history, rows_rechecked) where result is the same ValidationResult
+    # Schema.check_rows would return for the whole sheet
+    resolved, missing = schema.resolve(header)
+    if missing:
+        return schema.missing_result(missing), history, 0
+    labels = [column.label for _, column in resolved]
+    positions = [position for position, _ in resolved]
+    previous = history['rows'] if history and history['labels'] == labels else {}
+
+    fingerprints = {}
+    changed = []
+    rows_checked = 0
+    for row_index, row in rows:
+        fingerprint = fingerprints[row_index] = row_fingerprint([row[position] for position in positions])
+        stored = previous.get(str(row_index))
+        if stored is None or stored[0] != fingerprint:
+            changed.append((row_index, row))
+        elif not (schema.skip_empty_rows and all(is_blank(row[position]) for position in positions)):
+            rows_checked += 1
+
+    partial = schema.check_rows(header, changed)
+    rows_checked += partial.rows_checked
+    changed_rows = {row_index for row_index, _ in changed}
+    row_errors = {row_index: [] if row_index in changed_rows else previous[str(row_index)][1]
+                  for row_index in fingerprints}
+    for error in partial.errors:
+        row_errors[error.row].append([error.column, partial.templates[error.code], error.value])
+
+    new_history = {
+        'labels': labels,
+        'rows': {str(row_index): [fingerprints[row_index], row_errors[row_index]] for row_index in fingerprints},
+    }
+    return result_from_history(schema, new_history, rows_checked), new_history, partial.rows_checked
+
+def result_from_history(schema, history, rows_checked):
+    # Rebuilds the errors in sheet order, numbering templates as Schema.check_rows does
+    templates = [EMPTY_CELL_TEMPLATE]
+    template_codes = {EMPTY_CELL_TEMPLATE: 0}
+    errors = []
+    for row_index, (_, row_errors) in sorted(history['rows'].items(), key=lambda item: int(item[0])):
+        for column, template, value in row_errors:
+            code = template_codes.get(template)
+            if code is None:
+                code = template_codes[template] = len(templates)
+                templates.append(template)
+            errors.append(ValidationError(int(row_index), column, code, value))
+    return schema.finish(history['labels'], templates, errors, rows_checked)
+
+def check_workbook(schema, source, histories=None, slot_source=None):
+    # Validates every sheet Schema.matching_sheets picks, in a single load. histories maps
+    # sheet titles to their history; the sheets are still read in full, only the cell
+    # checks of unchanged rows are skipped. With slot_source (the ticket key), rows whose
+    # cells are valid are also checked for End time after Start Time, and those errors
+    # become part of the sheet's result and history; a sheet that still passes gets its
+    # slot_schedule slots. Returns [(sheet title, result, new_history, rows_rechecked,
+    # slots)], slots being None for sheets without them.
+    histories = histories or {}
+    with metrics.span('load_workbook'):
+        sheets = read_workbook_rows(source, schema.header_row, schema.first_row, schema.last_row, schema.max_data_rows)
+    results = []
+    with metrics.span('check_cells'):
+        for title, header, rows, too_many_rows in schema.matching_sheets(sheets):
+            history = histories.get(title)
+            if too_many_rows:
+                results.append((title, ValidationResult(TOO_MANY_ROWS, schema.too_many_rows_message), history, 0, None))
+                continue
+            result, new_history, rows_rechecked = check_rows(schema, header, rows, history)
+            slots = None
+            if slot_source is not None and result.status in (PASSED, ERRORS):
+                invalid_rows = {error.row for error in result.errors}
+                slots, order_errors = slots_from_rows(schema, header, [(row_index, row) for row_index, row in rows
+                                                                       if row_index not in invalid_rows], slot_source)
+                if order_errors:
+                    for row_index, column, template, value in order_errors:
+                        # A new list: unchanged rows share theirs with the previous history
+                        stored = new_history['rows'][str(row_index)]
+                        stored[1] = stored[1] + [[column, template, value]]
+                    result = result_from_history(schema, new_history, result.rows_checked)
+                if not result.passed:
+                    slots = None
+            results.append((title, result, new_history, rows_rechecked, slots))
+    return results
+
+def delta_messages(result, history, new_history):
+    # The messages to post for a re-upload: full messages for rows that changed and still
+    # have errors, one line for rows that were fixed or are still invalid unchanged
+    if result.status not in (ERRORS, PASSED, EMPTY_SHEET) or not history or history['labels'] != new_history['labels']:
+        return list(result.messages())
+    previous = history['rows']
+    current = new_history['rows']
+    errors_by_row = {}
+    for error in result.errors:
+        errors_by_row.setdefault(error.row, []).append(error)
+
+    messages = []
+    for row in sorted({int(row) for row in previous} | {int(row) for row in current}):
+        old = previous.get(str(row))
+        new = current.get(str(row))
+        if new is None:
+            if old[1]:
+                messages.append(f"Row {row} was removed.")
+        elif not new[1]:
+            if old is not None and old[1]:
+                messages.append(f"Row {row} fixed.")
+        elif old is not None and old[0] == new[0]:
+            messages.append(f"Row {row} still invalid.")
+        else:
+            messages.extend(result.message(error) for error in errors_by_row[row])
+    messages.append(result.summary)
+    return messages
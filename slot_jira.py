@@ -0,0 +1,119 @@
+import random
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from slot_metrics import metrics
+
+# Connection policy for the JIRA session shared by the ticket workers: keep-alive pooling,
+# a cap on requests in flight per endpoint, a token bucket for the overall request rate,
+# timeouts, and retries with jittered exponential backoff on 429/5xx and dropped
+# connections. It is installed as the session's transport adapter, so every call made
+# through the JIRA client (issue, search, comments and attachment.get()) goes through it.
+#
+#   jira = connect('https://your-jira-instance.com', basic_auth=('user', 'password'))
+
+# Requests in flight per endpoint; comments and downloads are the expensive ones for JIRA
+CONCURRENCY = {'comment': 4, 'attachment': 4, 'search': 2, 'default': 8}
+
+# Statuses worth retrying. POSTs are only retried when the server says it did not act on
+# the request (429, 503), so a comment is never posted twice.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_POST_STATUSES = {429, 503}
+
+def endpoint(url):
+    path = urlsplit(url).path
+    if path.endswith('/comment'):
+        return 'comment'
+    if '/attachment/content/' in path or '/secure/attachment/' in path:
+        return 'attachment'
+    if path.endswith('/search'):
+        return 'search'
+    return 'default'
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self._tokens = burst
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        # Blocks until a token is available; returns the seconds spent waiting
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            sleep(delay)
+            waited += delay
+
+class LimitedAdapter(HTTPAdapter):
+    def __init__(self, concurrency=None, rate=20.0, burst=40, retries=4, backoff=0.5, max_backoff=30.0,
+                 timeout=(5, 60)):
+        concurrency = dict(CONCURRENCY, **(concurrency or {}))
+        # Enough keep-alive connections for every request that may be in flight at once
+        super().__init__(pool_connections=4, pool_maxsize=sum(concurrency.values()), max_retries=0)
+        self.semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in concurrency.items()}
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout  # (connect, read) seconds, used when the caller passes none
+
+    def delay(self, attempt, response=None):
+        # Full jitter, but never sooner than the server's Retry-After
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        retry_statuses = RETRY_POST_STATUSES if request.method == 'POST' else RETRY_STATUSES
+        # Limits requests until their response headers arrive; streamed bodies are read after
+        semaphore = self.semaphores[endpoint(request.url)]
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                waited = self.bucket.take()
+                if waited:
+                    metrics.count('http_throttled')
+            with semaphore:
+                try:
+                    response = super().send(request, timeout=timeout, **kwargs)
+                except (ConnectionError, Timeout):
+                    # A POST that timed out may have been applied; only retry idempotent calls
+                    if attempt >= self.retries or request.method == 'POST':
+                        raise
+                    response = None
+            if response is not None and (response.status_code not in retry_statuses or attempt >= self.retries):
+                return response
+            if response is not None:
+                response.content  # read the error body so the connection goes back to the pool
+                response.close()
+            metrics.count('http_retries')
+            sleep(self.delay(attempt, response))
+            attempt += 1
+
+def install(jira, **limits):
+    # Replaces the transport of an existing JIRA client; see LimitedAdapter for the limits
+    session = jira._session
+    session.max_retries = 0  # the adapter retries; the jira client's own loop would multiply them
+    adapter = LimitedAdapter(**limits)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return jira
+
+def connect(server, basic_auth, **limits):
+    from jira import JIRA
+    return install(JIRA(options={'server': server}, basic_auth=basic_auth, max_retries=0), **limits)
@@ -0,0 +1,53 @@
+def read_sheet_rows(source, header_row, first_row, last_row=None, max_data_rows=None):
+    # Streams the active sheet in read-only, values-only mode and returns
+    # (header_values, rows, too_many_rows), where rows is a list of (row_index, values).
+    #
+    # Reading stops at last_row when one is given. The data extent is found from the
+    # cell values themselves instead of sheet.max_row (which is unreliable in read-only
+    # mode and counts formatted-but-empty rows): trailing empty rows are dropped, and
+    # when max_data_rows is set, reading stops at the first non-empty row past that
+    # limit and too_many_rows is returned as True.
+    import openpyxl  # imported on first use; it dominates the start-up time of every script
+    workbook = openpyxl.load_workbook(source, read_only=True)
+    try:
+        return read_rows(workbook.active, header_row, first_row, last_row, max_data_rows)
+    finally:
+        workbook.close()
+
+def read_workbook_rows(source, header_row, first_row, last_row=None, max_data_rows=None):
+    # Like read_sheet_rows, for every worksheet of the workbook in a single load. Returns
+    # [(title, is_active, header_values, rows, too_many_rows)] in tab order.
+    import openpyxl
+    workbook = openpyxl.load_workbook(source, read_only=True)
+    try:
+        active = workbook.active
+        return [(sheet.title, sheet is active) + read_rows(sheet, header_row, first_row, last_row, max_data_rows)
+                for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
+
+def read_rows(sheet, header_row, first_row, last_row, max_data_rows):
+    limit_row = first_row + max_data_rows - 1 if max_data_rows is not None else None
+    header = ()
+    rows = []
+    data_rows = 0
+    for row_index, values in enumerate(sheet.iter_rows(min_row=header_row, max_row=last_row, values_only=True), start=header_row):
+        if row_index == header_row:
+            header = values
+            continue
+        if row_index < first_row:
+            continue
+
+        has_data = any(value is not None for value in values)
+        if has_data and limit_row is not None and row_index > limit_row:
+            return header, rows[:data_rows], True
+
+        # Rows can be ragged in read-only mode; pad them to the header width
+        if len(values) < len(header):
+            values = values + (None,) * (len(header) - len(values))
+        rows.append((row_index, values))
+        if has_data:
+            data_rows = len(rows)
+
+    del rows[data_rows:]
+    return header, rows, False
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+from functools import wraps
+from time import perf_counter, time as now
+
+# Stage timings and counters for the validation pipeline (JIRA fetch, download, workbook
+# load, cell checks, comments, cache), exported as a Prometheus text file and/or a
+# JSON-lines trace with one line per finished span.
+#
+# Recording is off by default. While disabled, span() returns a shared no-op context
+# manager and count() returns immediately, so the instrumented code pays one attribute
+# check per call.
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'labels', 'start')
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.metrics.observe(self.name, perf_counter() - self.start, exc_type is not None, **self.labels)
+        return False
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.started = perf_counter()
+        self.counters = {}  # name -> total
+        self.spans = {}  # name -> [count, total seconds, max seconds, errors]
+        self._trace = None
+        self._lock = threading.Lock()
+
+    def enable(self, trace_path=None):
+        # trace_path: append one JSON object per finished span to this file
+        with self._lock:
+            if trace_path is not None and self._trace is None:
+                # Unbuffered: every span line is a single append, and a forked worker
+                # inherits no half-written buffer
+                self._trace = open(trace_path, 'ab', buffering=0)
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+    def reset(self):
+        with self._lock:
+            self.started = perf_counter()
+            self.counters = {}
+            self.spans = {}
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, labels)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds, error=False, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += error
+            if self._trace is not None:
+                record = {'ts': round(now(), 6), 'span': name, 'seconds': round(seconds, 6), 'thread': threading.current_thread().name}
+                record.update(labels)
+                if error:
+                    record['error'] = True
+                self._trace.write((json.dumps(record, default=str) + '\n').encode())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uptime_seconds': perf_counter() - self.started,
+                'counters': dict(self.counters),
+                'spans': {name: list(stats) for name, stats in self.spans.items()},
+            }
+
+    def merge(self, snapshot):
+        # Adds the counters and span totals recorded in another process
+        if not self.enabled or not snapshot:
+            return
+        with self._lock:
+            for name, amount in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            for name, (count, total, peak, errors) in snapshot['spans'].items():
+                stats = self.spans.get(name)
+                if stats is None:
+                    stats = self.spans[name] = [0, 0.0, 0.0, 0]
+                stats[0] += count
+                stats[1] += total
+                stats[2] = max(stats[2], peak)
+                stats[3] += errors
+
+    def summary(self):
+        snapshot = self.snapshot()
+        uptime = snapshot['uptime_seconds']
+        lines = []
+        tickets = snapshot['counters'].get('tickets', 0)
+        lines.append(f"Metrics: {tickets} tickets in {uptime:.1f}s ({tickets / uptime if uptime > 0 else 0.0:.2f} tickets/sec)")
+        for name, amount in sorted(snapshot['counters'].items()):
+            if name != 'tickets':
+                lines.append(f"  {name}: {amount:g}")
+        for name, (count, total, peak, errors) in sorted(snapshot['spans'].items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name}: {count} x {total / count * 1000:.1f} ms avg, {peak * 1000:.1f} ms max, "
+                         f"{total:.2f}s total" + (f", {errors} errors" if errors else ""))
+        return '\n'.join(lines)
+
+    def prometheus_text(self, prefix='slot_validation'):
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_uptime_seconds gauge",
+            f"{prefix}_uptime_seconds {snapshot['uptime_seconds']:.3f}",
+        ]
+        for name, amount in sorted(snapshot['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {amount:g}")
+        if snapshot['spans']:
+            lines.append(f"# TYPE {prefix}_stage_seconds summary")
+            for name, (count, total, _, _) in sorted(snapshot['spans'].items()):
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+            for name, (_, _, peak, _) in sorted(snapshot['spans'].items()):
+                lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {peak:.6f}')
+            lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+            for name, (_, _, _, errors) in sorted(snapshot['spans'].items()):
+                lines.append(f'{prefix}_stage_errors_total{{stage="{name}"}} {errors}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, prefix='slot_validation'):
+        # Written atomically, for node_exporter's textfile collector
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(self.prometheus_text(prefix))
+        os.replace(temp_path, path)
+
+# Process-wide recorder used by the instrumented modules
+metrics = Metrics()
+
+def _after_fork_in_child():
+    # A forked parse worker may inherit the lock while another thread holds it, and must
+    # not write into the parent's trace file
+    metrics._lock = threading.Lock()
+    metrics._trace = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def timed(name):
+    # Decorator: records every call of the function as a span
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            with metrics.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def recorded_call(func, *args, **kwargs):
+    # Runs func in a worker process with a fresh recorder and returns (result, snapshot),
+    # so the parent can merge the worker's stage timings with metrics.merge(snapshot)
+    metrics.reset()
+    metrics.enable()
+    result = func(*args, **kwargs)
+    return result, metrics.snapshot()
+
+def profile_call(path, func, *args, **kwargs):
+    # Deep dive into a single call, e.g.
+    #   profile_call('PROJECT-123.prof', process_jira_ticket, jira, 'PROJECT-123')
+    # The stats are saved to path (open with snakeviz or pstats) and the top entries printed.
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
@@ -0,0 +1,170 @@
+import re
+import zipfile
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, ParseError
+from slot_result import ValidationResult, TOO_MANY_ROWS, REJECTED
+
+# Cheap checks run on an attachment before the full openpyxl load. The size comes from
+# the attachment metadata; the workbook itself is only opened as a zip (central
+# directory), workbook.xml is read to find the sheets, and each sheet's XML is streamed
+# just far enough to get the header row and to see whether the data rows stay within the
+# schema's limit. Rejections use the same messages as a full validation where one exists
+# (missing columns, too many rows).
+
+MAX_ATTACHMENT_BYTES = 20 * 1024 * 1024
+MAX_UNCOMPRESSED_BYTES = 200 * 1024 * 1024  # zip bombs
+OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # encrypted .xlsx files and legacy .xls
+
+CORRUPT_MESSAGE = "Error: The attachment is not a valid .xlsx workbook (the file is corrupt)."
+PROTECTED_MESSAGE = ("Error: The workbook is password-protected or is not an .xlsx file. "
+                     "Please upload an unprotected .xlsx workbook.")
+
+CELL_REFERENCE = re.compile(r'([A-Z]+)(\d+)')
+
+def rejected(message):
+    return ValidationResult(REJECTED, message)
+
+def check_size(size, max_bytes=MAX_ATTACHMENT_BYTES):
+    # Runs on the attachment metadata, before downloading
+    if size and size > max_bytes:
+        return rejected(f"Error: The attachment is {size / 1048576:.1f} MB; "
+                        f"slot request workbooks are limited to {max_bytes / 1048576:.0f} MB.")
+    return None
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+def sheet_paths(archive):
+    # The worksheet parts in tab order, and the index of the one openpyxl's
+    # workbook.active resolves to (the activeTab)
+    active_tab = 0
+    sheet_ids = []
+    for _, element in iterparse(archive.open('xl/workbook.xml')):
+        name = local_name(element.tag)
+        if name == 'workbookView':
+            active_tab = int(element.get('activeTab', 0))
+        elif name == 'sheet':
+            sheet_ids.append(next(value for key, value in element.attrib.items() if local_name(key) == 'id'))
+    targets = {}
+    for _, element in iterparse(archive.open('xl/_rels/workbook.xml.rels')):
+        if local_name(element.tag) == 'Relationship':
+            targets[element.get('Id')] = element.get('Target')
+    paths = [target.lstrip('/') if target.startswith('/') else 'xl/' + target
+             for target in (targets[sheet_id] for sheet_id in sheet_ids)]
+    return paths, min(active_tab, len(paths) - 1)
+
+def shared_strings(archive, needed):
+    # Reads shared strings only up to the highest index the header uses
+    strings = []
+    if not needed or 'xl/sharedStrings.xml' not in archive.namelist():
+        return strings
+    last = max(needed)
+    for _, element in iterparse(archive.open('xl/sharedStrings.xml')):
+        if local_name(element.tag) == 'si':
+            strings.append(''.join(text.text or '' for text in element.iter() if local_name(text.tag) == 't'))
+            element.clear()
+            if len(strings) > last:
+                break
+    return strings
+
+def cell_value(cell):
+    # (type, raw value) of a <c> element, or None when the cell is empty
+    kind = cell.get('t', 'n')
+    value = formula = None
+    for child in cell:
+        name = local_name(child.tag)
+        if name == 'v':
+            value = child.text
+        elif name == 'f':
+            formula = child.text
+        elif name == 'is':
+            value = ''.join(text.text or '' for text in child.iter() if local_name(text.tag) == 't')
+            kind = 'inlineStr'
+    if value is None:
+        return ('formula', '=' + formula) if formula is not None else None
+    return kind, value
+
+def header_value(kind, value, strings):
+    if kind == 's':
+        return strings[int(value)]
+    if kind == 'n':
+        return float(value) if any(char in value for char in '.eE') else int(value)
+    if kind == 'b':
+        return value == '1'
+    return value
+
+def screen(source, schema):
+    # Returns a ValidationResult rejecting the workbook, or None when it should be
+    # validated in full. source: the workbook bytes or a path.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if bytes(source[:8]) == OLE_SIGNATURE:
+            return rejected(PROTECTED_MESSAGE)
+        source = BytesIO(source)
+    else:
+        with open(source, 'rb') as f:
+            if f.read(8) == OLE_SIGNATURE:
+                return rejected(PROTECTED_MESSAGE)
+    try:
+        with zipfile.ZipFile(source) as archive:
+            uncompressed = sum(info.file_size for info in archive.infolist())
+            if uncompressed > MAX_UNCOMPRESSED_BYTES:
+                return rejected(f"Error: The workbook expands to {uncompressed / 1048576:.0f} MB, more than the "
+                                f"{MAX_UNCOMPRESSED_BYTES / 1048576:.0f} MB limit.")
+            paths, active = sheet_paths(archive)
+            scans = [scan_sheet(archive, path, schema) for path in paths]
+            strings = shared_strings(archive, [int(value) for header_cells, _ in scans
+                                               for kind, value in header_cells.values() if kind == 's'])
+    except (zipfile.BadZipFile, KeyError, StopIteration, ParseError, ValueError, IndexError, EOFError):
+        return rejected(CORRUPT_MESSAGE)
+
+    # The full validation checks every sheet with all mandatory columns, so the workbook
+    # is only turned away when none of them can pass; with no such sheet, the active
+    # sheet's problem is reported
+    missing_by_sheet = []
+    matching = []
+    for header_cells, too_many_rows in scans:
+        width = max(header_cells, default=0)
+        header = tuple(header_value(*header_cells[column], strings) if column in header_cells else None
+                       for column in range(1, width + 1))
+        _, missing = schema.resolve(header)
+        missing_by_sheet.append(missing)
+        if not missing:
+            matching.append(too_many_rows)
+    if len(matching) > 1 or matching == [False]:
+        return None
+    if matching or scans[active][1]:
+        return ValidationResult(TOO_MANY_ROWS, schema.too_many_rows_message)
+    return schema.missing_result(missing_by_sheet[active])
+
+def scan_sheet(archive, path, schema):
+    # Streams the sheet XML. Returns ({column: (type, raw value)} of the header row,
+    # too_many_rows), stopping at the first non-empty row past the schema's row limit, or
+    # right after the header when the schema has no limit.
+    limit_row = (schema.first_row + schema.max_data_rows - 1) if schema.max_data_rows is not None else None
+    header_cells = {}
+    row_index = 0
+    for _, element in iterparse(archive.open(path)):
+        if local_name(element.tag) != 'row':
+            continue
+        row_index = int(element.get('r', row_index + 1))
+        if schema.last_row is not None and row_index > schema.last_row:
+            break
+        if row_index == schema.header_row:
+            column = 0
+            for cell in element:
+                column = column_number(CELL_REFERENCE.match(cell.get('r')).group(1)) if cell.get('r') else column + 1
+                value = cell_value(cell)
+                if value is not None:
+                    header_cells[column] = value
+            if limit_row is None:
+                break
+        elif limit_row is not None and row_index > limit_row and any(cell_value(cell) is not None for cell in element):
+            return header_cells, True
+        element.clear()
+    return header_cells, False
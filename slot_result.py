@@ -0,0 +1,73 @@
+import sys
+
+# Structured validation results. Validators only build these; console and JIRA output
+# are sinks that render a finished result, so callers can aggregate, dedupe or route
+# results without re-parsing printed text.
+
+PASSED = 'passed'
+ERRORS = 'errors'
+EMPTY_SHEET = 'empty_sheet'
+MISSING_COLUMNS = 'missing_columns'
+TOO_MANY_ROWS = 'too_many_rows'
+REJECTED = 'rejected'  # refused by slot_prescreen before a full load
+
+EMPTY_CELL = 0  # error code of an empty mandatory cell; other codes index result.templates
+EMPTY_CELL_TEMPLATE = "{label} is empty."
+
+class ValidationError:
+    __slots__ = ('row', 'column', 'code', 'value')
+
+    def __init__(self, row, column, code, value):
+        self.row = row  # sheet row number
+        self.column = column  # index into result.labels
+        self.code = code  # index into result.templates
+        self.value = value  # offending cell value
+
+    def __repr__(self):
+        return f"ValidationError(row={self.row}, column={self.column}, code={self.code}, value={self.value!r})"
+
+class ValidationResult:
+    __slots__ = ('status', 'summary', 'labels', 'templates', 'errors', 'missing', 'rows_checked')
+
+    def __init__(self, status, summary, labels=(), templates=(EMPTY_CELL_TEMPLATE,), errors=None,
+                 missing=(), rows_checked=0):
+        self.status = status
+        self.summary = summary  # final line, e.g. "Validation complete. No errors found."
+        self.labels = labels  # column labels as used in messages
+        self.templates = templates  # message templates with {value} and {label}
+        self.errors = errors if errors is not None else []
+        self.missing = missing  # missing mandatory column names
+        self.rows_checked = rows_checked
+
+    @property
+    def passed(self):
+        return self.status == PASSED
+
+    def message(self, error):
+        template = self.templates[error.code]
+        return f"Error in row {error.row}: " + template.format(value=error.value, label=self.labels[error.column])
+
+    def messages(self):
+        # The lines the validators used to print, in the same order
+        for error in self.errors:
+            yield self.message(error)
+        yield self.summary
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'summary': self.summary,
+            'missing': list(self.missing),
+            'rows_checked': self.rows_checked,
+            'errors': [
+                {'row': error.row, 'column': self.labels[error.column], 'code': error.code,
+                 'message': self.message(error)}
+                for error in self.errors
+            ],
+        }
+
+def print_result(result, file=None):
+    # Console sink
+    file = file or sys.stdout
+    for message in result.messages():
+        print(message, file=file)
@@ -0,0 +1,246 @@
+import threading
+from datetime import date
+from bisect import bisect_left, bisect_right, insort
+from math import inf
+from slot_timeparse import parse_hour, parse_clock_time, parse_iso_date
+
+# Cross-row and cross-ticket checks on validated slot requests: End time must be after
+# Start Time, requested slots on the same date must not overlap, and the MIPS requested
+# for any hour window of a date must stay within capacity.
+#
+# SlotSchedule is an incremental interval index. Per date it keeps a centred interval
+# tree over the minutes of the day, so the slots overlapping a new one are found in
+# O(log + k) however long the other slots are, and an hourly MIPS load array that is
+# updated in place as tickets arrive or are re-validated.
+
+MINUTES_PER_DAY = 24 * 60
+MAX_LISTED_CONFLICTS = 3  # other slots named in one conflict message; the rest are counted
+
+class Slot:
+    __slots__ = ('date', 'start', 'end', 'mips', 'source', 'row', 'sheet')
+
+    def __init__(self, date, start, end, mips, source, row, sheet=None):
+        self.date = date  # datetime.date
+        self.start = start  # minutes since midnight
+        self.end = end
+        self.mips = mips
+        self.source = source  # e.g. the ticket key
+        self.row = row  # sheet row number
+        self.sheet = sheet  # e.g. 'slots.xlsx / Sheet1' when the ticket has several sheets
+
+    def to_dict(self):
+        return {'date': self.date.isoformat(), 'start': self.start, 'end': self.end, 'mips': self.mips,
+                'source': self.source, 'row': self.row, 'sheet': self.sheet}
+
+    def describe(self):
+        where = f"{self.sheet} in {self.source}" if self.sheet else self.source
+        return (f"row {self.row} of {where} ({self.date:%Y-%m-%d} "
+                f"{self.start // 60:02d}:{self.start % 60:02d}-{self.end // 60:02d}:{self.end % 60:02d})")
+
+def slot_from_dict(values):
+    # Inverse of Slot.to_dict, for slots stored in the attachment cache
+    return Slot(date.fromisoformat(values['date']), values['start'], values['end'], values['mips'],
+                values['source'], values['row'], values.get('sheet'))
+
+def minutes(value):
+    return value.hour * 60 + value.minute
+
+def slots_from_rows(schema, header, rows, source):
+    # Builds Slot objects from rows that already passed schema validation. Returns
+    # (slots, errors); errors are [(row, column, template, value)] for rows whose End time
+    # is not after Start Time, column indexing the schema's resolved columns as in a
+    # ValidationResult.
+    resolved, missing = schema.resolve(header)
+    if missing:
+        return [], []
+    roles = {}
+    for n, (position, column) in enumerate(resolved):
+        name = column.name.lower()
+        kind = getattr(column.check, 'kind', None)
+        if kind == 'number':
+            roles['mips'] = position
+        elif kind == 'iso_date':
+            roles['date'] = position
+        elif name.startswith('start'):
+            roles['start'] = position
+        elif name.startswith('end'):
+            roles['end'] = position
+            end_column = n
+    parse_time = parse_clock_time if any(getattr(column.check, 'kind', None) == 'clock_time'
+                                         for _, column in resolved) else parse_hour
+
+    slots = []
+    errors = []
+    for row_index, row in rows:
+        values = [row[roles[role]] for role in ('mips', 'date', 'start', 'end')]
+        if any(value is None for value in values):
+            continue  # blank rows are skipped by the validators
+        mips, date, start, end = values
+        date = parse_iso_date(date)
+        start = parse_time(start)
+        end = parse_time(end)
+        if date is None or start is None or end is None:
+            continue
+        start, end = minutes(start), minutes(end)
+        if end <= start:
+            # The start value is part of the template; braces are escaped for str.format
+            start_text = str(row[roles['start']]).replace('{', '{{').replace('}', '}}')
+            errors.append((row_index, end_column, f"End time '{{value}}' is not after Start Time '{start_text}'.",
+                           row[roles['end']]))
+            continue
+        slots.append(Slot(date.date(), start, end, float(mips), source, row_index))
+    return slots, errors
+
+class IntervalNode:
+    # Covers the minutes [lo, hi) and holds the slots containing its centre minute, sorted
+    # by start and by end; slots entirely before or after the centre go to a child
+    __slots__ = ('lo', 'hi', 'center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, lo, hi):
+        self.lo = lo
+        self.hi = hi
+        self.center = (lo + hi) // 2
+        self.by_start = []  # [(start, seq, slot)]
+        self.by_end = []  # [(end, seq, slot)]
+        self.left = None
+        self.right = None
+
+    def node_for(self, start, end, create=False):
+        # The node a slot [start, end) is stored in: the first one whose centre it contains
+        node = self
+        while not start <= node.center < end:
+            if end <= node.center:
+                if node.left is None and create:
+                    node.left = IntervalNode(node.lo, node.center)
+                node = node.left
+            else:
+                if node.right is None and create:
+                    node.right = IntervalNode(node.center + 1, node.hi)
+                node = node.right
+            if node is None:
+                return None
+        return node
+
+class SlotSchedule:
+    def __init__(self, capacity=None):
+        self.capacity = capacity  # MIPS allowed per hour window of a date, None = unlimited
+        self._trees = {}  # date -> IntervalNode over the minutes of the day
+        self._load = {}  # date -> [MIPS requested in hour 0..23]
+        self._by_source = {}  # ticket -> [(seq, slot)], including tickets without slots
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def overlapping(self, slot, limit=None):
+        # Returns (up to limit of the slots overlapping slot, how many overlap in total)
+        found = []
+        count = 0
+        nodes = [self._trees.get(slot.date)]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            # Every slot in the node contains its centre
+            if slot.end <= node.center:
+                # Left of the centre: the node's slots that start before slot ends
+                first, last = 0, bisect_left(node.by_start, (slot.end,))
+                entries = node.by_start
+                nodes.append(node.left)
+            elif slot.start > node.center:
+                # Right of the centre: the node's slots that end after slot starts
+                first, last = bisect_right(node.by_end, (slot.start, inf)), len(node.by_end)
+                entries = node.by_end
+                nodes.append(node.right)
+            else:
+                first, last = 0, len(node.by_start)
+                entries = node.by_start
+                nodes.extend((node.left, node.right))
+            count += last - first
+            wanted = last - first if limit is None else min(last - first, limit - len(found))
+            found.extend(other for _, _, other in entries[first:first + wanted])
+        found.sort(key=lambda other: (other.start, other.end, str(other.source), other.row))
+        return found, count
+
+    def _insert(self, slot):
+        self._seq += 1
+        tree = self._trees.get(slot.date)
+        if tree is None:
+            tree = self._trees[slot.date] = IntervalNode(0, MINUTES_PER_DAY)
+        node = tree.node_for(slot.start, slot.end, create=True)
+        insort(node.by_start, (slot.start, self._seq, slot))
+        insort(node.by_end, (slot.end, self._seq, slot))
+        self._by_source.setdefault(slot.source, []).append((self._seq, slot))
+        load = self._load.setdefault(slot.date, [0.0] * 24)
+        for hour in range(slot.start // 60, (slot.end - 1) // 60 + 1):
+            load[hour] += slot.mips
+
+    def add(self, slot):
+        # Indexes the slot and returns the conflict messages it causes: one naming the
+        # slots it overlaps, one per run of hours it takes over capacity
+        with self._lock:
+            messages = []
+            others, count = self.overlapping(slot, MAX_LISTED_CONFLICTS)
+            if count:
+                listed = ', '.join(other.describe() for other in others)
+                more = f" and {count - len(others)} more" if count > len(others) else ""
+                messages.append(f"Conflict: {slot.describe()} overlaps {listed}{more}.")
+            self._insert(slot)
+            if self.capacity is not None:
+                load = self._load[slot.date]
+                over = [hour for hour in range(slot.start // 60, (slot.end - 1) // 60 + 1) if load[hour] > self.capacity]
+                # One message per run of consecutive hours over capacity
+                runs = []
+                for hour in over:
+                    if runs and runs[-1][1] == hour:
+                        runs[-1][1] = hour + 1
+                    else:
+                        runs.append([hour, hour + 1])
+                for first, last in runs:
+                    peak = max(load[first:last])
+                    messages.append(f"Capacity exceeded on {slot.date:%Y-%m-%d} {first:02d}:00-{last:02d}:00: "
+                                    f"up to {peak:g} MIPS requested (limit {self.capacity:g}) "
+                                    f"including {slot.describe()}.")
+            return messages
+
+    def add_many(self, slots):
+        messages = []
+        for slot in sorted(slots, key=lambda slot: (slot.date, slot.start, slot.end)):
+            messages.extend(self.add(slot))
+        return messages
+
+    def remove_source(self, source):
+        # Drops every slot of a ticket, e.g. before indexing its re-uploaded workbook
+        with self._lock:
+            dates = set()
+            for seq, slot in self._by_source.pop(source, ()):
+                node = self._trees[slot.date].node_for(slot.start, slot.end)
+                del node.by_start[bisect_left(node.by_start, (slot.start, seq))]
+                del node.by_end[bisect_left(node.by_end, (slot.end, seq))]
+                dates.add(slot.date)
+            # The hourly load is summed again rather than subtracted, so no rounding residue
+            # is left to trip the capacity check
+            for date in dates:
+                load = [0.0] * 24
+                nodes = [self._trees[date]]
+                while nodes:
+                    node = nodes.pop()
+                    if node is None:
+                        continue
+                    for start, _, slot in node.by_start:
+                        for hour in range(start // 60, (slot.end - 1) // 60 + 1):
+                            load[hour] += slot.mips
+                    nodes.extend((node.left, node.right))
+                self._load[date] = load
+
+    def replace_source(self, source, slots):
+        # Re-indexes one ticket's slots; returns the conflicts of the new set
+        self.remove_source(source)
+        with self._lock:
+            self._by_source.setdefault(source, [])
+        return self.add_many(slots)
+
+    def has_source(self, source):
+        with self._lock:
+            return source in self._by_source
+
+    def load(self, date):
+        return list(self._load.get(date, [0.0] * 24))
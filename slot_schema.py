@@ -0,0 +1,195 @@
+from datetime import datetime, time
+from slot_loader import read_sheet_rows
+from slot_metrics import metrics
+from slot_timeparse import parse_hour, parse_clock_time, parse_iso_date
+from slot_result import (ValidationError, ValidationResult, EMPTY_CELL, EMPTY_CELL_TEMPLATE,
+                         PASSED, ERRORS, EMPTY_SHEET, MISSING_COLUMNS, TOO_MANY_ROWS)
+
+# Column validators. Each factory returns a precompiled check(value) that gives None for
+# a valid cell or an error message template with {value} and {label} placeholders.
+# check.kind names the kind of check; slot_columnar uses it to pick a bulk NumPy path
+# and slot_schedule to find the MIPS/date/time columns.
+
+def number():
+    def check(value):
+        try:
+            float(value)
+        except (ValueError, TypeError):
+            return "MIPS '{value}' is not a valid number."
+        return None
+    check.kind = 'number'
+    return check
+
+def iso_date(strict_types=False):
+    # strict_types: only datetime objects and strings are accepted (Fourth.py/fifth.py);
+    # otherwise any other value is checked through its string form.
+    def check(value):
+        if isinstance(value, datetime):
+            return None
+        if strict_types and not isinstance(value, str):
+            return "Date '{value}' is neither a string nor a datetime object."
+        if parse_iso_date(value) is None:
+            return "Invalid date format '{value}'. Use YYYY-MM-DD."
+        return None
+    check.kind = 'iso_date'
+    return check
+
+def hour_of_day():
+    # Whole hours 0-23 given as numbers or strings, or time/datetime objects
+    def check(value):
+        if parse_hour(value) is None:
+            return "Invalid time format '{value}' for {label}. Use whole numbers from 0 to 23."
+        return None
+    check.kind = 'hour_of_day'
+    return check
+
+def clock_time():
+    def check(value):
+        if isinstance(value, (datetime, time)):
+            return None
+        if not isinstance(value, str):
+            return "{label} '{value}' is not a valid time format."
+        if parse_clock_time(value) is None:
+            return "Invalid time format '{value}' for {label}. Use HH, HH:MM, or HHMM (24-hour format), optionally followed by BST."
+        return None
+    check.kind = 'clock_time'
+    return check
+
+def text():
+    def check(value):
+        if not isinstance(value, str) or value.strip() == '':
+            return "Project Name '{value}' is not a valid string."
+        return None
+    check.kind = 'text'
+    return check
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == '')
+
+class Column:
+    def __init__(self, name, check, label=None):
+        self.name = name
+        self.check = check
+        self.label = label or name  # how the column is named in error messages
+
+class Schema:
+    # A declarative description of one slot-request layout. Header positions are resolved
+    # once per sheet; each row then runs the precompiled column checks by position.
+    def __init__(self, columns, header_row=1, first_row=None, last_row=None, max_data_rows=None,
+                 ignore_case=False, column_order='sheet', skip_empty_rows=False, blank_is_empty=False,
+                 missing_message="Error: Not all mandatory columns are present in the sheet.",
+                 too_many_rows_message=None,
+                 empty_sheet_message=None,
+                 ok_message="Validation complete. No errors found.",
+                 error_message="Validation complete. Errors were found."):
+        self.columns = columns
+        self.header_row = header_row
+        self.first_row = first_row or header_row + 1
+        self.last_row = last_row
+        self.max_data_rows = max_data_rows
+        self.ignore_case = ignore_case
+        self.column_order = column_order  # 'sheet': report columns in header order, 'schema': in declared order
+        self.skip_empty_rows = skip_empty_rows  # skip rows where every mandatory cell is blank
+        self.blank_is_empty = blank_is_empty  # treat whitespace-only strings as empty cells
+        self.missing_message = missing_message  # may use {missing}
+        self.too_many_rows_message = too_many_rows_message or f"Error: The sheet has more than {max_data_rows} data rows."
+        self.empty_sheet_message = empty_sheet_message
+        self.ok_message = ok_message
+        self.error_message = error_message
+        self._by_key = {self._key(column.name): column for column in columns}
+
+    def _key(self, header):
+        if self.ignore_case and isinstance(header, str):
+            return header.strip().lower()
+        return header
+
+    def resolve(self, header):
+        # Returns ([(position, column), ...], missing_column_names)
+        positions = {}
+        for position, header_value in enumerate(header):
+            if not header_value:
+                continue
+            column = self._by_key.get(self._key(header_value))
+            if column is not None:
+                positions[column.name] = position  # later duplicates win, as in the old scripts
+        missing = [column.name for column in self.columns if column.name not in positions]
+        if self.column_order == 'schema':
+            resolved = [(positions[column.name], column) for column in self.columns if column.name in positions]
+        else:
+            by_name = {column.name: column for column in self.columns}
+            resolved = [(position, by_name[name]) for name, position in positions.items()]
+        return resolved, missing
+
+    def check(self, source, columnar=False):
+        # Validates the active sheet of source and returns a ValidationResult
+        if columnar:
+            # Bulk uploads: NumPy column checks without the data-row limit
+            import slot_columnar
+            return slot_columnar.check(self, source)
+        with metrics.span('load_workbook'):
+            header, rows, too_many_rows = read_sheet_rows(source, self.header_row, self.first_row,
+                                                          self.last_row, self.max_data_rows)
+        if too_many_rows:
+            return ValidationResult(TOO_MANY_ROWS, self.too_many_rows_message)
+        with metrics.span('check_cells'):
+            return self.check_rows(header, rows)
+
+    def matching_sheets(self, sheets):
+        # sheets: read_workbook_rows output. Returns (title, header, rows, too_many_rows) for
+        # every sheet that has all mandatory columns; when none has, the active sheet alone,
+        # so its missing columns are reported as for a single-sheet check.
+        matching = [(title, header, rows, too_many_rows) for title, _, header, rows, too_many_rows in sheets
+                    if not self.resolve(header)[1]]
+        if matching:
+            return matching
+        return [(title, header, rows, too_many_rows) for title, is_active, header, rows, too_many_rows in sheets
+                if is_active][:1]
+
+    def missing_result(self, missing):
+        return ValidationResult(MISSING_COLUMNS,
+                                self.missing_message.format(missing=', '.join(name.lower() for name in missing)),
+                                missing=tuple(missing))
+
+    def finish(self, labels, templates, errors, rows_checked):
+        # Builds the result once every row has been checked
+        if rows_checked == 0 and self.empty_sheet_message:
+            status, summary = EMPTY_SHEET, self.empty_sheet_message
+        elif not errors:
+            status, summary = PASSED, self.ok_message
+        else:
+            status, summary = ERRORS, self.error_message
+        return ValidationResult(status, summary, tuple(labels), tuple(templates), errors, rows_checked=rows_checked)
+
+    def check_rows(self, header, rows):
+        resolved, missing = self.resolve(header)
+        if missing:
+            return self.missing_result(missing)
+
+        positions = [position for position, _ in resolved]
+        checks = [(n, position, column.check) for n, (position, column) in enumerate(resolved)]
+        blank_is_empty = self.blank_is_empty
+        skip_empty_rows = self.skip_empty_rows
+        templates = [EMPTY_CELL_TEMPLATE]
+        template_codes = {}
+        errors = []
+        rows_checked = 0
+
+        for row_index, row in rows:
+            if skip_empty_rows and all(is_blank(row[position]) for position in positions):
+                continue
+            rows_checked += 1
+
+            for n, position, check in checks:
+                value = row[position]
+                if value is None or (blank_is_empty and isinstance(value, str) and value.strip() == ''):
+                    errors.append(ValidationError(row_index, n, EMPTY_CELL, value))
+                    continue
+                template = check(value)
+                if template is not None:
+                    code = template_codes.get(template)
+                    if code is None:
+                        code = template_codes[template] = len(templates)
+                        templates.append(template)
+                    errors.append(ValidationError(row_index, n, code, value))
+
+        return self.finish([column.label for _, column in resolved], templates, errors, rows_checked)
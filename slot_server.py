@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from time import perf_counter
+
+# Resident validator for per-ticket hooks and cron jobs. "serve" starts a long-lived
+# process that imports openpyxl, jira and the layout schemas once and keeps one
+# authenticated JIRA session; the other commands send it a job over a local socket
+# instead of paying the interpreter, import and login cost on every run, e.g.
+#
+#   python slot_server.py serve
+#   python slot_server.py validate --layout Fourth request.xlsx
+#   python slot_server.py ticket PROJECT-123
+#
+# One job per connection: the client sends one JSON line and reads one JSON line back.
+# The server only listens on 127.0.0.1.
+
+DEFAULT_PORT = 8765
+
+class JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            reply = self.server.run_job(json.loads(self.rfile.readline()))
+        except Exception as e:
+            reply = {'status': 'failed', 'error': repr(e)}
+        self.wfile.write((json.dumps(reply, default=str) + '\n').encode())
+
+class SlotServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=DEFAULT_PORT, jira_factory=None, cache=None, schedule=None):
+        super().__init__(('127.0.0.1', port), JobHandler)
+        self.jira_factory = jira_factory  # called once, on the first ticket job
+        self.cache = cache
+        self.schedule = schedule  # slot_schedule.SlotSchedule shared by all ticket jobs
+        self.jobs = 0
+        self._jira = None
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        # Pays the import cost before the first job arrives
+        import openpyxl
+        import jira
+        from validate_slots import LAYOUTS, layout_schema
+        for layout in LAYOUTS:
+            layout_schema(layout)
+
+    def jira(self):
+        with self._lock:
+            if self._jira is None:
+                if self.jira_factory is None:
+                    raise RuntimeError("This server was started without JIRA credentials.")
+                self._jira = self.jira_factory()
+            return self._jira
+
+    def run_job(self, job):
+        with self._lock:
+            self.jobs += 1
+        kind = job.get('job')
+        if kind == 'ping':
+            return {'status': 'ok', 'pid': os.getpid(), 'jobs': self.jobs}
+        if kind == 'validate':
+            from validate_slots import LAYOUTS, validate_file
+            if job.get('layout') not in LAYOUTS:
+                raise ValueError(f"Unknown layout {job.get('layout')!r}")
+            return validate_file(job['layout'], job['path'])
+        if kind == 'ticket':
+            from fifth import process_jira_ticket
+            start = perf_counter()
+            # The slot_jira session retries failed calls, so comment posts are not retried again
+            process_jira_ticket(self.jira(), job['key'], cache=self.cache, schedule=self.schedule, retries=0)
+            return {'status': 'done', 'key': job['key'], 'elapsed_ms': round((perf_counter() - start) * 1000, 3)}
+        raise ValueError(f"Unknown job {kind!r}")
+
+def submit(job, port=DEFAULT_PORT, timeout=300):
+    # Sends one job to the resident validator and returns its reply
+    with socket.create_connection(('127.0.0.1', port), timeout=timeout) as connection:
+        connection.sendall((json.dumps(job) + '\n').encode())
+        with connection.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+def serve(port, jira_factory=None, cache=None, schedule=None):
+    server = SlotServer(port, jira_factory, cache, schedule)
+    server.warm_up()
+    print(f"Slot validator ready on 127.0.0.1:{port} (pid {os.getpid()}).", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    from validate_slots import LAYOUTS
+    parser = argparse.ArgumentParser(description="Resident slot validator and its client.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="start the resident validator")
+    serve_parser.add_argument('--no-jira', action='store_true', help="only accept file validation jobs")
+    validate_parser = commands.add_parser('validate', help="validate workbooks on the resident validator")
+    validate_parser.add_argument('paths', nargs='+', help="files, glob patterns or directories")
+    validate_parser.add_argument('--layout', choices=LAYOUTS, default='FinalValidation1',
+                                 help="which validator's schema to apply (default: FinalValidation1)")
+    ticket_parser = commands.add_parser('ticket', help="validate JIRA tickets on the resident validator")
+    ticket_parser.add_argument('keys', nargs='+')
+    commands.add_parser('ping', help="check that the resident validator is running")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        jira_factory = None
+        if not args.no_jira:
+            def jira_factory():
+                from slot_jira import connect
+                # JIRA connection details
+                return connect('https://your-jira-instance.com', basic_auth=('your_username', 'your_password'))
+        cache = schedule = None
+        if jira_factory is not None:
+            # The cache and the schedule only serve ticket jobs
+            from slot_cache import AttachmentCache
+            from fifth import load_schedule
+            cache = AttachmentCache()
+            schedule = load_schedule(cache)
+        serve(args.port, jira_factory, cache, schedule)
+        return 0
+
+    if args.command == 'ping':
+        jobs = [{'job': 'ping'}]
+    elif args.command == 'validate':
+        from validate_slots import expand_paths
+        jobs = [{'job': 'validate', 'layout': args.layout, 'path': os.path.abspath(path)}
+                for path in expand_paths(args.paths)]
+    else:
+        jobs = [{'job': 'ticket', 'key': key} for key in args.keys]
+
+    ok = True
+    for job in jobs:
+        try:
+            reply = submit(job, args.port)
+        except OSError as e:
+            print(f"Error: No slot validator on 127.0.0.1:{args.port} ({e}). "
+                  f"Start one with: python slot_server.py serve", file=sys.stderr)
+            return 2
+        sys.stdout.write(json.dumps(reply, default=str) + '\n')
+        ok = ok and reply.get('status') in ('ok', 'done', 'passed')
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+from datetime import datetime, time
+from functools import lru_cache
+import re
+
+# Shared parsers for the Date / Start Time / End time cells. String inputs go through a
+# hand-written fast path (no strptime for the common formats) and are memoised in a
+# bounded LRU cache, since a sheet repeats the same few dates and hours on every row.
+# Each parser returns the parsed value, or None when the cell is not valid.
+
+CACHE_SIZE = 4096
+
+CLOCK_TIME_PATTERN = re.compile(r'^(\d{1,2}(:\d{2})?|\d{3,4})$')
+ISO_DATE_PATTERN = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+HOURS = [time(hours, 0) for hours in range(24)]
+
+def parse_hour(value):
+    # Whole hours 0-23 as int/float/str, or time/datetime objects
+    # (FinalValidation.py / FinalValidation1.py / XLVAL.PY)
+    if isinstance(value, str):
+        return _parse_hour_string(value)
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    if isinstance(value, (int, float)):
+        try:
+            hours = int(value)
+        except (ValueError, OverflowError):  # NaN / infinity
+            return None
+        return HOURS[hours] if 0 <= hours <= 23 else None
+    return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_hour_string(value):
+    try:
+        hours = int(value)
+    except ValueError:
+        return None
+    return HOURS[hours] if 0 <= hours <= 23 else None
+
+def parse_clock_time(value):
+    # HH, HH:MM or HHMM strings in 24-hour format, optionally followed by BST, or
+    # time/datetime objects (Fourth.py / fifth.py)
+    if isinstance(value, str):
+        return _parse_clock_string(value)
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_clock_string(value):
+    cleaned_value = value.strip().upper().replace('BST', '').strip()
+    if not CLOCK_TIME_PATTERN.match(cleaned_value):
+        return None
+    if ':' in cleaned_value:
+        hours, minutes = cleaned_value.split(':')
+        hours = int(hours)
+        minutes = int(minutes)
+    elif len(cleaned_value) <= 2:
+        hours = int(cleaned_value)
+        minutes = 0
+    else:
+        hours = int(cleaned_value[:-2])
+        minutes = int(cleaned_value[-2:])
+    if 0 <= hours <= 23 and 0 <= minutes <= 59:
+        return time(hours, minutes)
+    return None
+
+def parse_iso_date(value):
+    # YYYY-MM-DD; datetime objects pass through and other values are parsed from
+    # their string form
+    if isinstance(value, datetime):
+        return value
+    return _parse_date_string(value if isinstance(value, str) else str(value))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_date_string(value):
+    match = ISO_DATE_PATTERN.fullmatch(value)
+    if match:
+        try:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+    # Rare spellings strptime also accepts (e.g. a space-padded day) take the slow path
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return None
@@ -0,0 +1,235 @@
+import json
+import os
+import queue
+import signal
+import threading
+from datetime import datetime, timedelta
+from fifth import process_jira_ticket, load_schedule
+from slot_cache import AttachmentCache
+from slot_metrics import metrics
+
+# Long-running watcher: polls JIRA for slot-request tickets updated since the last
+# watermark and feeds them to a fixed set of worker threads through a bounded queue.
+# When the workers fall behind the queue fills up and polling blocks (backpressure).
+#
+# The watermark is saved to state_path after every poll. It never moves past a ticket
+# that is still queued, being processed or waiting to be retried after a failure, so a
+# restart re-polls unfinished work.
+#
+# The validation comments themselves bump a ticket's 'updated' time. After a ticket is
+# processed, the time of the last comment posted is recorded in seen, so the next poll
+# skips updates up to it instead of validating (and commenting on) the ticket again.
+
+JIRA_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+SELF_UPDATE_SLACK = timedelta(seconds=1)  # the issue's 'updated' can trail the comment's 'created'
+
+def parse_jira_time(value):
+    return datetime.strptime(value, JIRA_TIME_FORMAT)
+
+class SlotWatcher:
+    def __init__(self, jira, jql, state_path='slot_watcher_state.json', poll_interval=10, workers=4,
+                 queue_size=100, overlap_minutes=1, cache=None, metrics_path=None, max_attempts=5,
+                 **ticket_options):
+        self.jira = jira  # one session shared by the poller and all workers
+        self.jql = jql
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.overlap = timedelta(minutes=overlap_minutes)  # JQL dates only have minute precision
+        self.cache = cache
+        self.metrics_path = metrics_path  # Prometheus text file rewritten after every poll
+        self.max_attempts = max_attempts  # tries per ticket update before it is given up on
+        self.ticket_options = ticket_options
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pending = {}  # issue key -> updated timestamp, queued or in progress
+        self.retry = {}  # issue key -> updated timestamp, failed and to be polled again
+        self.attempts = {}  # issue key -> (updated timestamp, failed attempts at that update)
+        self.processed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.watermark, self.seen = self.load_state()
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return None, {}
+        with open(self.state_path) as f:
+            state = json.load(f)
+        watermark = parse_jira_time(state['watermark']) if state.get('watermark') else None
+        return watermark, state.get('seen', {})
+
+    def low_watermark(self, *unfinished):
+        # The watermark held back to the oldest unfinished ticket; caller holds _lock
+        times = [parse_jira_time(updated) for group in unfinished for updated in group.values()]
+        if self.watermark is not None:
+            times.append(self.watermark)
+        return min(times) if times else None
+
+    def save_state(self):
+        with self._lock:
+            watermark = self.low_watermark(self.pending, self.retry)
+            state = {
+                'watermark': watermark.strftime(JIRA_TIME_FORMAT) if watermark else None,
+                # Unfinished tickets are left out so a restart picks them up again
+                'seen': {key: updated for key, updated in self.seen.items() if key not in self.pending},
+            }
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def poll_jql(self, watermark):
+        if watermark is None:
+            return f"{self.jql} ORDER BY updated ASC"
+        # JQL reads dates in the JIRA user's timezone, assumed to match this machine's
+        since = (watermark - self.overlap).astimezone().strftime('%Y/%m/%d %H:%M')
+        return f'({self.jql}) AND updated >= "{since}" ORDER BY updated ASC'
+
+    def poll_once(self):
+        # Enqueues tickets that are new or changed since the watermark; returns how many
+        with self._lock:
+            watermark = self.low_watermark(self.retry)
+        issues = self.jira.search_issues(self.poll_jql(watermark), fields='updated', maxResults=False)
+        since = watermark - self.overlap if watermark is not None else None
+        enqueued = 0
+        returned = set()
+        for issue in issues:
+            if self._stopping.is_set():
+                break
+            returned.add(issue.key)
+            updated = issue.fields.updated
+            updated_at = parse_jira_time(updated)
+            with self._lock:
+                if since is not None and updated_at < since:
+                    continue
+                seen = self.seen.get(issue.key)
+                if (seen is not None and updated_at <= parse_jira_time(seen)) or issue.key in self.pending:
+                    continue
+                self.pending[issue.key] = updated
+                self.retry.pop(issue.key, None)
+                # Recorded before queueing, so a worker's own update of seen is never overwritten
+                self.seen[issue.key] = updated
+                if self.watermark is None or updated_at > self.watermark:
+                    self.watermark = updated_at
+            self.queue.put((issue.key, updated))  # blocks while the workers are saturated
+            enqueued += 1
+        else:
+            with self._lock:
+                # A failed ticket that no longer matches the JQL must not hold the watermark back
+                for issue_key in set(self.retry) - returned:
+                    del self.retry[issue_key]
+
+        self.forget_old_tickets()
+        self.save_state()
+        self.export_metrics()
+        return enqueued
+
+    def export_metrics(self):
+        if self.metrics_path is None:
+            return
+        metrics.write_prometheus(self.metrics_path)
+
+    def forget_old_tickets(self):
+        # Only tickets inside the overlap window can be returned twice
+        with self._lock:
+            watermark = self.low_watermark(self.retry)
+            if watermark is None:
+                return
+            cutoff = watermark - self.overlap * 2
+            self.seen = {key: updated for key, updated in self.seen.items() if parse_jira_time(updated) >= cutoff}
+
+    def worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            issue_key, updated = item
+            try:
+                report = process_jira_ticket(self.jira, issue_key, cache=self.cache, **self.ticket_options)
+            except Exception as e:
+                print(f"Error processing {issue_key}: {e!r}")
+                self.ticket_failed(issue_key, updated)
+            else:
+                self.ticket_done(issue_key, updated, report)
+            finally:
+                with self._lock:
+                    self.pending.pop(issue_key, None)
+                self.queue.task_done()
+
+    def ticket_done(self, issue_key, updated, report):
+        with self._lock:
+            self.processed += 1
+            self.attempts.pop(issue_key, None)
+            posted_at = getattr(report, 'last_posted_at', None)
+            if posted_at is not None:
+                # Our own comments must not look like a new change to the ticket
+                posted_at = parse_jira_time(posted_at) + SELF_UPDATE_SLACK
+                if posted_at > parse_jira_time(self.seen.get(issue_key, updated)):
+                    self.seen[issue_key] = posted_at.strftime(JIRA_TIME_FORMAT)
+
+    def ticket_failed(self, issue_key, updated):
+        # The ticket is polled again (and the watermark held at it) until it succeeds or
+        # max_attempts is reached; a later edit to the ticket starts over
+        with self._lock:
+            self.failed += 1
+            failed_update, attempts = self.attempts.get(issue_key, (updated, 0))
+            attempts = attempts + 1 if failed_update == updated else 1
+            self.attempts[issue_key] = (updated, attempts)
+            if attempts >= self.max_attempts:
+                print(f"Giving up on {issue_key} after {attempts} attempts.")
+                self.attempts.pop(issue_key)
+                return
+            if self.seen.get(issue_key) == updated:
+                del self.seen[issue_key]
+            self.retry[issue_key] = updated
+
+    def run(self):
+        threads = [threading.Thread(target=self.worker, name=f'slot-worker-{i}', daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    enqueued = self.poll_once()
+                    if enqueued:
+                        print(f"Queued {enqueued} tickets ({self.queue.qsize()} waiting, "
+                              f"{self.processed} processed, {self.failed} failed).")
+                except Exception as e:
+                    print(f"Error polling JIRA: {e!r}")
+                self._stopping.wait(self.poll_interval)
+        finally:
+            # Let queued tickets finish, then record the final watermark
+            for _ in threads:
+                self.queue.put(None)
+            for thread in threads:
+                thread.join()
+            self.save_state()
+            self.export_metrics()
+            if self.cache is not None:
+                print(self.cache.summary())
+
+    def stop(self, *args):
+        self._stopping.set()
+
+if __name__ == '__main__':
+    from slot_jira import connect
+
+    # JIRA connection details; the session pools connections, limits requests in flight
+    # and retries 429/5xx itself, so comment posts are not retried again on top
+    jira = connect('https://your-jira-instance.com', basic_auth=('your_username', 'your_password'))
+
+    # Tickets to watch
+    jql = 'project = PROJECT AND status = Open'
+
+    # Stage timings and counters, exported for node_exporter's textfile collector
+    metrics.enable()
+
+    # Slots of every ticket validated so far, for the overlap and capacity checks
+    cache = AttachmentCache()
+    watcher = SlotWatcher(jira, jql, cache=cache, metrics_path='slot_metrics.prom', schedule=load_schedule(cache),
+                          retries=0)
+    signal.signal(signal.SIGTERM, watcher.stop)
+    signal.signal(signal.SIGINT, watcher.stop)
+    watcher.run()
@@ -0,0 +1,106 @@
+import socket
+import pytest
+
+jira_module = pytest.importorskip('jira')
+requests = pytest.importorskip('requests')
+
+from jira.exceptions import JIRAError
+from fifth import CommentReport
+
+# CommentReport against a stand-in JIRA client that counts add_comment calls
+
+class Comment:
+    def __init__(self, created):
+        self.created = created
+
+class CountingJira:
+    def __init__(self, *failures):
+        self.failures = list(failures)  # raised by the first calls, in order; None posts
+        self.calls = 0
+        self.bodies = []
+
+    def add_comment(self, issue, body):
+        self.calls += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        self.bodies.append(body)
+        return Comment(f'2026-01-01T00:00:{len(self.bodies):02d}.000+0000')
+
+def make_report(jira, **options):
+    return CommentReport(jira, 'SLOT-1', backoff=0, **options)
+
+def refused_connection():
+    # A requests ConnectionError for a port nothing listens on
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+    try:
+        requests.post(f'http://127.0.0.1:{port}/rest/api/2/issue/SLOT-1/comment', timeout=5)
+    except requests.exceptions.ConnectionError as e:
+        return e
+    raise AssertionError('connection was not refused')
+
+@pytest.mark.parametrize('failure', [JIRAError(status_code=429), JIRAError(status_code=503), None])
+def test_retries_when_jira_did_not_act(failure):
+    failure = failure or refused_connection()
+    jira = CountingJira(failure)
+    report = make_report(jira)
+    report.add('Error in row 2: MIPS is empty.')
+    report.flush()
+    assert jira.calls == 2
+    assert jira.bodies == ['Error in row 2: MIPS is empty.']
+    assert report.comments_posted == 1
+
+@pytest.mark.parametrize('failure', [
+    requests.exceptions.ReadTimeout('read timed out'),
+    requests.exceptions.ConnectionError('connection aborted'),
+    JIRAError(status_code=500),
+    JIRAError(status_code=502),
+    OSError('broken pipe'),
+])
+def test_does_not_retry_a_post_that_may_have_been_applied(failure):
+    jira = CountingJira(failure)
+    report = make_report(jira)
+    report.add('Error in row 2: MIPS is empty.')
+    with pytest.raises(type(failure)):
+        report.flush()
+    assert jira.calls == 1
+
+def test_gives_up_after_retries():
+    jira = CountingJira(*[JIRAError(status_code=503)] * 5)
+    report = make_report(jira, retries=3)
+    report.add('Error in row 2: MIPS is empty.')
+    with pytest.raises(JIRAError):
+        report.flush()
+    assert jira.calls == 4
+    assert report.messages == ['Error in row 2: MIPS is empty.']
+
+def test_failed_flush_does_not_repost_earlier_chunks():
+    # Three messages, one per comment; the second comment fails without a retry
+    messages = ['a' * 20, 'b' * 20, 'c' * 20]
+    jira = CountingJira(None, requests.exceptions.ReadTimeout('read timed out'))
+    report = make_report(jira, max_chars=25)
+    for message in messages:
+        report.add(message)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        report.flush()
+    assert jira.bodies == messages[:1]
+    assert report.messages == messages[1:]
+
+    report.flush()
+    assert jira.bodies == messages
+    assert jira.calls == 4
+    assert report.messages == []
+    assert report.last_posted_at == '2026-01-01T00:00:03.000+0000'
+
+def test_chunks_stay_under_max_chars():
+    jira = CountingJira()
+    report = make_report(jira, max_chars=30)
+    for n in range(10):
+        report.add(f'message {n}')
+    report.flush()
+    assert all(len(body) <= 30 for body in jira.bodies)
+    assert '\n'.join(jira.bodies).split('\n') == [f'message {n}' for n in range(10)]
+    assert report.comments_posted == len(jira.bodies)
@@ -0,0 +1,164 @@
+import io
+import types
+from datetime import date
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+import fifth
+from slot_cache import AttachmentCache
+from slot_schedule import SlotSchedule
+
+# fifth.process_jira_ticket against an in-process fake JIRA client
+
+HEADER = ['MIPS', 'date', 'start time', 'end time']
+DAY = date(2026, 1, 1)
+
+def workbook(*sheets):
+    # sheets: (title, rows) pairs; the first sheet is the active one
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    for title, rows in sheets:
+        sheet = book.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+class Attachment:
+    def __init__(self, id, filename, data, created='2026-01-01T00:00:00.000+0000'):
+        self.id = id
+        self.filename = filename
+        self.data = data
+        self.size = len(data)
+        self.created = created
+        self.downloads = 0
+
+    def get(self):
+        self.downloads += 1
+        return self.data
+
+class FakeJira:
+    def __init__(self):
+        self.attachments = {}  # issue key -> [Attachment]
+        self.comments = {}  # issue key -> [comment body]
+
+    def issue(self, key):
+        return types.SimpleNamespace(key=key, fields=types.SimpleNamespace(attachment=self.attachments.get(key, [])))
+
+    def add_comment(self, issue, body):
+        self.comments.setdefault(issue.key, []).append(body)
+
+    def lines(self, key):
+        return '\n'.join(self.comments.pop(key, [])).split('\n')
+
+@pytest.fixture
+def jira():
+    return FakeJira()
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AttachmentCache(str(tmp_path / 'cache.sqlite3'))
+    yield cache
+    cache.close()
+
+def run(jira, key, cache=None, schedule=None):
+    return fifth.process_jira_ticket(jira, key, cache=cache, schedule=schedule, retries=0)
+
+def test_end_before_start_is_an_error_of_the_sheet(jira, cache):
+    attachment = Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [10, '2026-01-01', '10:00', '11:00'],
+                                                         [5, '2026-01-01', '10', '09']])))
+    jira.attachments['T-1'] = [attachment]
+    run(jira, 'T-1', cache, SlotSchedule())
+    assert jira.lines('T-1') == [
+        "Error in row 3: End time '09' is not after Start Time '10'.",
+        fifth.schema.error_message,
+    ]
+    assert cache.get(attachment).passed is False
+
+def test_end_before_start_counts_against_the_sheet_in_the_merged_summary(jira):
+    jira.attachments['T-1'] = [
+        Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [5, '2026-01-01', '10', '09']]))),
+        Attachment(2, 'b.xlsx', workbook(('S', [HEADER, [5, '2026-01-02', '10', '11']]))),
+    ]
+    run(jira, 'T-1', schedule=SlotSchedule())
+    lines = jira.lines('T-1')
+    assert lines[:3] == ["a.xlsx / S:", "Error in row 2: End time '09' is not after Start Time '10'.",
+                         fifth.schema.error_message]
+    assert lines[-1] == "Validated 2 sheets in 2 attachments: 1 passed, 1 with errors."
+
+def test_rejected_attachments_are_not_counted_as_sheets(jira):
+    jira.attachments['T-1'] = [
+        Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [5, '2026-01-02', '10', '11']]))),
+        Attachment(2, 'b.xlsx', b'not a workbook'),
+    ]
+    run(jira, 'T-1')
+    assert jira.lines('T-1')[-1] == ("Validated 1 sheet in 1 attachment: 1 passed, 0 with errors. "
+                                     "1 attachment could not be validated.")
+
+def test_a_ticket_with_only_rejected_attachments(jira):
+    jira.attachments['T-1'] = [Attachment(1, 'a.xlsx', b'not a workbook'), Attachment(2, 'b.xlsx', b'PK')]
+    run(jira, 'T-1')
+    assert jira.lines('T-1')[-1] == "2 attachments could not be validated."
+
+def test_conflicts_get_their_own_closing_line(jira):
+    schedule = SlotSchedule()
+    jira.attachments['T-1'] = [Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [10, '2026-01-01', '10:00', '11:00']])))]
+    jira.attachments['T-2'] = [Attachment(2, 'b.xlsx', workbook(('S', [HEADER] + [[10, '2026-01-01', '10:30', '11:30']] * 5)))]
+    run(jira, 'T-1', schedule=schedule)
+    run(jira, 'T-2', schedule=schedule)
+    lines = jira.lines('T-2')
+    assert lines[0] == fifth.schema.ok_message
+    assert [line.split(' overlaps ')[0] for line in lines[1:-1]] == [
+        f"Conflict: row {row} of T-2 (2026-01-01 10:30-11:30)" for row in range(2, 7)]
+    assert lines[-1] == "Schedule check complete. 5 conflicts with the slot schedule."
+
+def test_conflict_messages_are_capped(jira, monkeypatch):
+    monkeypatch.setattr(fifth, 'MAX_CONFLICT_MESSAGES', 2)
+    jira.attachments['T-1'] = [Attachment(1, 'a.xlsx', workbook(('S', [HEADER] + [[10, '2026-01-01', '10', '11']] * 5)))]
+    run(jira, 'T-1', schedule=SlotSchedule())
+    lines = jira.lines('T-1')
+    assert len(lines) == 1 + 2 + 1
+    assert lines[-1] == "Schedule check complete. 4 conflicts with the slot schedule. The first 2 are listed above."
+
+def test_a_superseded_upload_leaves_the_schedule(jira, cache):
+    schedule = SlotSchedule()
+    jira.attachments['T-1'] = [Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [10, '2026-01-01', '10', '11']])))]
+    run(jira, 'T-1', cache, schedule)
+    # The same file name re-uploaded with a bad MIPS value: none of its rows are valid slots
+    jira.attachments['T-1'] = [Attachment(2, 'a.xlsx', workbook(('S', [HEADER, ['x', '2026-01-01', '10', '11']])),
+                                          created='2026-01-02T00:00:00.000+0000')]
+    run(jira, 'T-1', cache, schedule)
+    assert cache.get_slots('T-1') == {}
+
+    jira.attachments['T-2'] = [Attachment(3, 'b.xlsx', workbook(('S', [HEADER, [10, '2026-01-01', '10', '11']])))]
+    run(jira, 'T-2', cache, schedule)
+    assert jira.lines('T-2') == [fifth.schema.ok_message]
+    # A restart rebuilds the same schedule from the cache
+    assert fifth.load_schedule(cache).load(DAY) == schedule.load(DAY)
+
+def test_cache_hits_keep_the_ticket_in_the_schedule(jira, cache):
+    jira.attachments['T-1'] = [Attachment(1, 'a.xlsx', workbook(('S', [HEADER, [10, '2026-01-01', '10', '11']])))]
+    run(jira, 'T-1', cache, SlotSchedule())
+    schedule = SlotSchedule()
+    run(jira, 'T-1', cache, schedule)
+    assert schedule.has_source('T-1')
+    assert schedule.load(DAY)[10] == 10.0
+
+
+def test_a_reupload_of_the_same_bytes_is_downloaded_once(jira, cache):
+    data = workbook(('S', [HEADER, [10, '2026-01-01', '10', '11']]))
+    first = Attachment(10, 'a.xlsx', data)
+    jira.attachments['T-1'] = [first]
+    run(jira, 'T-1', cache)
+    again = Attachment(11, 'a (1).xlsx', data, created='2026-01-02T00:00:00.000+0000')
+    jira.attachments['T-1'] = [first, again]
+    for _ in range(3):
+        run(jira, 'T-1', cache)
+    assert [first.downloads, again.downloads] == [1, 1]
+    assert jira.lines('T-1') == [fifth.schema.ok_message]
+    # Five pre-download hits credit their time; the content hit after a download does not
+    hits, time_saved = cache.hits, cache.time_saved
+    assert hits == 6
+    assert time_saved == pytest.approx(5 * cache.get(first).cost_seconds, rel=1e-6)
@@ -0,0 +1,128 @@
+import importlib
+import json
+import random
+from datetime import datetime, time
+from io import BytesIO
+import pytest
+
+pytest.importorskip('openpyxl')
+
+from generate_workbooks import HEADERS, make_rows, make_workbook
+import slot_incremental
+
+# Incremental re-validation must give the same result as a full check of the sheet
+
+LAYOUTS = {'FinalValidation': 'row3', 'FinalValidation1': 'row3', 'Fourth': 'row1', 'fifth': 'row1'}
+
+def sheet(layout, count, seed, error_rate=0.3):
+    header = tuple(HEADERS[layout] + ['Notes'])
+    rows = [(4 + n, tuple(row) + ('late',)) for n, row in enumerate(make_rows(count, layout, error_rate, 'mixed', seed))]
+    return header, rows
+
+def edit(rows, rng):
+    # A re-upload: some cells changed (including datetime/time objects and blanks), rows
+    # dropped from the end or added
+    rows = [(row_index, list(row)) for row_index, row in rows]
+    for row_index, row in rows:
+        if rng.random() < 0.3:
+            row[rng.randrange(len(row) - 1)] = rng.choice([None, '', 'abc', 12.5, '2024-02-30', '23',
+                                                           datetime(2024, 5, 6), time(9, 30), 'Project Z'])
+    width = len(rows[0][1])
+    rows = rows[:len(rows) - rng.randint(0, 3)]
+    last = rows[-1][0] if rows else 3
+    rows += [(last + n + 1, [1.5, '2024-05-06', '09', '10', 'P', None][:width]) for n in range(rng.randint(0, 3))]
+    return [(row_index, tuple(row)) for row_index, row in rows]
+
+def round_trip(history):
+    # As stored by AttachmentCache.put_history
+    return json.loads(json.dumps(history, default=str))
+
+def same_result(result, full):
+    assert list(result.messages()) == list(full.messages())
+    assert result.status == full.status
+    assert result.rows_checked == full.rows_checked
+
+@pytest.mark.parametrize('module', sorted(LAYOUTS))
+def test_incremental_check_matches_full_check(module):
+    schema = importlib.import_module(module).schema
+    rng = random.Random(module)
+    for seed in range(40):
+        header, before = sheet(LAYOUTS[module], rng.randint(1, 12), seed)
+        after = edit(before, rng)
+        _, history, _ = slot_incremental.check_rows(schema, header, before)
+        full = schema.check_rows(header, after)
+        result, new_history, rows_rechecked = slot_incremental.check_rows(schema, header, after, round_trip(history))
+        same_result(result, full)
+        # Checking the same rows again against their own history rechecks nothing
+        again, _, rows_rechecked = slot_incremental.check_rows(schema, header, after, round_trip(new_history))
+        same_result(again, full)
+        assert rows_rechecked == 0
+
+def test_check_workbook_matches_full_check():
+    schema = importlib.import_module('FinalValidation1').schema
+    before = make_workbook(30, 'row3', 0.2, 'mixed', seed=1)
+    after = make_workbook(30, 'row3', 0.2, 'mixed', seed=2)
+    [(title, _, history, _, _)] = slot_incremental.check_workbook(schema, BytesIO(before))
+    [(_, result, _, _, _)] = slot_incremental.check_workbook(schema, BytesIO(after), {title: round_trip(history)})
+    same_result(result, schema.check(BytesIO(after)))
+
+def test_a_changed_header_rechecks_every_row():
+    schema = importlib.import_module('fifth').schema  # columns are reported in sheet order
+    header, rows = sheet('row1', 5, 3)
+    _, history, _ = slot_incremental.check_rows(schema, header, rows)
+    swapped = (header[1], header[0]) + header[2:]
+    swapped_rows = [(row_index, (row[1], row[0]) + row[2:]) for row_index, row in rows]
+    result, _, rows_rechecked = slot_incremental.check_rows(schema, swapped, swapped_rows, round_trip(history))
+    same_result(result, schema.check_rows(swapped, swapped_rows))
+    assert rows_rechecked == 5
+
+# delta_messages, on the fifth.py layout
+
+HEADER = ('MIPS', 'date', 'start time', 'end time')
+
+def upload(*rows):
+    return [(2 + n, tuple(row)) for n, row in enumerate(rows)]
+
+def deltas(before, after, header=HEADER, after_header=HEADER):
+    schema = importlib.import_module('fifth').schema
+    _, history, _ = slot_incremental.check_rows(schema, header, before)
+    history = round_trip(history)
+    result, new_history, _ = slot_incremental.check_rows(schema, after_header, after, history)
+    return slot_incremental.delta_messages(result, history, new_history), result
+
+def test_delta_lines():
+    messages, result = deltas(
+        upload([10, '2024-05-06', '09', '17'], ['x', '2024-05-06', '09', '17'], [10, 'bad', '25', '17'],
+               [5, '2024-05-07', '10', '11'], [None, '2024-05-08', '10', '11']),
+        upload([10, '2024-05-06', '09', '17'], [12, '2024-05-06', '09', '17'], [10, 'bad', '25', '17'],
+               [5, '2024-05-07', '10', 'zz']),
+    )
+    assert messages == [
+        "Row 3 fixed.",
+        "Row 4 still invalid.",
+        "Error in row 5: Invalid time format 'zz' for end time. "
+        "Use HH, HH:MM, or HHMM (24-hour format), optionally followed by BST.",
+        "Row 6 was removed.",
+        result.summary,
+    ]
+    assert result.summary == importlib.import_module('fifth').schema.error_message
+
+def test_delta_lines_once_everything_is_fixed():
+    messages, result = deltas(upload(['x', '2024-05-06', '09', '17'], [10, '2024-05-06', '09', '17']),
+                              upload([10, '2024-05-06', '09', '17'], [10, '2024-05-06', '09', '17']))
+    assert messages == ["Row 2 fixed.", result.summary]
+    assert result.passed
+
+def test_a_changed_header_gets_the_full_messages():
+    before = upload(['x', '2024-05-06', '09', '17'], [10, 'bad', '09', '17'])
+    after_header = ('date', 'MIPS', 'start time', 'end time')
+    after = [(row_index, (row[1], row[0]) + row[2:]) for row_index, row in before]
+    messages, result = deltas(before, after, after_header=after_header)
+    assert messages == list(result.messages())
+    assert messages[:2] == ["Error in row 2: MIPS 'x' is not a valid number.",
+                            "Error in row 3: Invalid date format 'bad'. Use YYYY-MM-DD."]
+
+def test_a_first_upload_gets_the_full_messages():
+    schema = importlib.import_module('fifth').schema
+    result, new_history, _ = slot_incremental.check_rows(schema, HEADER, upload(['x', '2024-05-06', '09', '17']))
+    assert slot_incremental.delta_messages(result, None, new_history) == list(result.messages())
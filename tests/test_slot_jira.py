@@ -0,0 +1,134 @@
+import json
+import threading
+from time import monotonic, sleep
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from bench_jira_client import StubJira
+from slot_jira import LimitedAdapter, TokenBucket, connect
+
+# LimitedAdapter against the local stub JIRA, with faults scripted per request
+
+ISSUE = '/rest/api/2/issue/SLOT-1'
+COMMENT = '/rest/api/2/issue/SLOT-1/comment'
+
+@pytest.fixture
+def stub():
+    stub = StubJira(latency=0, error_rate=0)
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+def session(**limits):
+    # No rate limit and no backoff unless a test asks for them
+    limits = dict({'rate': None, 'backoff': 0.0}, **limits)
+    session = requests.Session()
+    session.mount('http://', LimitedAdapter(**limits))
+    return session
+
+def post_comment(session, stub):
+    return session.post(stub.url + COMMENT, data=json.dumps({'body': 'Validation complete.'}),
+                        headers={'Content-Type': 'application/json'})
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_get_is_retried(stub, status):
+    stub.faults[('GET', ISSUE)] = [(status, None, 0)] * 2
+    response = session().get(stub.url + ISSUE)
+    assert response.status_code == 200
+    assert stub.requests == 3
+
+def test_get_gives_up_after_retries(stub):
+    stub.faults[('GET', ISSUE)] = [(503, None, 0)] * 5
+    response = session(retries=2).get(stub.url + ISSUE)
+    assert response.status_code == 503
+    assert stub.requests == 3
+
+def test_retry_after_is_honoured(stub):
+    stub.faults[('GET', ISSUE)] = [(429, 1, 0)]
+    start = monotonic()
+    response = session().get(stub.url + ISSUE)
+    assert response.status_code == 200
+    assert monotonic() - start >= 1.0
+
+def test_get_is_retried_after_a_read_timeout(stub):
+    stub.faults[('GET', ISSUE)] = [(None, None, 0.5)]
+    response = session(timeout=(5, 0.2)).get(stub.url + ISSUE)
+    assert response.status_code == 200
+    assert stub.requests == 2
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_post_is_retried_when_jira_did_not_act(stub, status):
+    stub.faults[('POST', COMMENT)] = [(status, None, 0)]
+    response = post_comment(session(), stub)
+    assert response.status_code == 201
+    assert stub.requests == 2
+    assert stub.comments['SLOT-1'] == ['Validation complete.']
+
+@pytest.mark.parametrize('status', [500, 502])
+def test_post_is_not_retried_on_server_errors(stub, status):
+    stub.faults[('POST', COMMENT)] = [(status, None, 0)]
+    response = post_comment(session(), stub)
+    assert response.status_code == status
+    assert stub.requests == 1
+
+def test_post_is_not_retried_after_a_read_timeout(stub):
+    # The stub stores the comment after the client gave up on it: a retry would post it twice
+    stub.faults[('POST', COMMENT)] = [(None, None, 0.5)]
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        post_comment(session(timeout=(5, 0.2)), stub)
+    deadline = monotonic() + 5
+    while 'SLOT-1' not in stub.comments and monotonic() < deadline:
+        sleep(0.01)
+    assert stub.requests == 1
+    assert stub.comments['SLOT-1'] == ['Validation complete.']
+
+def test_requests_in_flight_stay_within_the_endpoint_limits(stub):
+    stub.latency = 0.05
+    client = session(concurrency={'default': 2, 'comment': 1})
+    calls = [lambda: client.get(stub.url + ISSUE)] * 12 + [lambda: post_comment(client, stub)] * 6
+    threads = [threading.Thread(target=call) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert stub.requests == 18
+    assert 1 <= stub.max_in_flight <= 3
+    assert len(stub.comments['SLOT-1']) == 6
+
+def test_one_endpoint_does_not_wait_for_another(stub):
+    # A slow comment holds the only comment slot; issue reads still go through
+    stub.faults[('POST', COMMENT)] = [(None, None, 1.0)]
+    client = session(concurrency={'comment': 1})
+    poster = threading.Thread(target=post_comment, args=(client, stub))
+    poster.start()
+    start = monotonic()
+    while stub.in_flight == 0 and monotonic() - start < 5:
+        sleep(0.01)
+    assert client.get(stub.url + ISSUE).status_code == 200
+    assert monotonic() - start < 0.8
+    poster.join(10)
+
+def test_token_bucket_throttles():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = monotonic()
+    waited = [bucket.take() for _ in range(6)]
+    # Two tokens at once, then one every 50 ms
+    assert waited[:2] == [0.0, 0.0]
+    assert monotonic() - start >= 4 / 20 * 0.9
+    assert all(seconds > 0 for seconds in waited[2:])
+
+def test_adapter_throttles_requests(stub):
+    client = session(rate=10, burst=1)
+    start = monotonic()
+    for _ in range(4):
+        assert client.get(stub.url + ISSUE).status_code == 200
+    assert monotonic() - start >= 3 / 10 * 0.9
+
+def test_connect_routes_the_jira_client_through_the_adapter(stub):
+    stub.faults[('GET', ISSUE)] = [(503, None, 0)]
+    jira = connect(stub.url, basic_auth=('user', 'password'), rate=None, backoff=0.0)
+    assert jira.issue('SLOT-1').key == 'SLOT-1'
+    assert not stub.faults[('GET', ISSUE)]
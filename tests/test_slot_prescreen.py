@@ -0,0 +1,98 @@
+import zipfile
+from io import BytesIO
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+import slot_incremental
+import slot_prescreen
+from fifth import schema
+from slot_result import REJECTED, MISSING_COLUMNS, TOO_MANY_ROWS
+
+# slot_prescreen.screen on workbooks for the fifth.py layout (header on row 1, at most
+# 5 data rows)
+
+HEADER = ['MIPS', 'date', 'start time', 'end time']
+ROW = [10, '2024-05-06', '09', '17']
+
+def workbook(*sheets, active=0):
+    # sheets: (header, data row count) per sheet, in tab order
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for n, (header, rows) in enumerate(sheets):
+        ws = wb.create_sheet(f'Sheet{n + 1}')
+        ws.append(header)
+        for _ in range(rows):
+            ws.append(ROW)
+    wb.active = active
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+def full_check(data):
+    [(_, result, _, _, _)] = slot_incremental.check_workbook(schema, BytesIO(data))
+    return result
+
+def test_valid_workbook_is_passed_on():
+    assert slot_prescreen.screen(workbook((HEADER, 3)), schema) is None
+
+def test_corrupt_zip_is_rejected():
+    data = workbook((HEADER, 3))
+    for corrupt in (b'not a workbook', data[:len(data) // 2]):
+        result = slot_prescreen.screen(corrupt, schema)
+        assert result.status == REJECTED
+        assert list(result.messages()) == [slot_prescreen.CORRUPT_MESSAGE]
+
+def test_zip_without_a_workbook_is_rejected():
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        archive.writestr('readme.txt', 'hello')
+    assert list(slot_prescreen.screen(output.getvalue(), schema).messages()) == [slot_prescreen.CORRUPT_MESSAGE]
+
+def test_ole_file_is_rejected(tmp_path):
+    data = slot_prescreen.OLE_SIGNATURE + bytes(504)
+    path = tmp_path / 'protected.xlsx'
+    path.write_bytes(data)
+    for source in (data, str(path)):
+        result = slot_prescreen.screen(source, schema)
+        assert result.status == REJECTED
+        assert list(result.messages()) == [slot_prescreen.PROTECTED_MESSAGE]
+
+def test_zip_bomb_is_rejected(monkeypatch):
+    monkeypatch.setattr(slot_prescreen, 'MAX_UNCOMPRESSED_BYTES', 1024 * 1024)
+    output = BytesIO(workbook((HEADER, 3)))
+    with zipfile.ZipFile(output, 'a', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('xl/media/padding.bin', bytes(2 * 1024 * 1024))
+    result = slot_prescreen.screen(output.getvalue(), schema)
+    assert result.status == REJECTED
+    assert list(result.messages()) == ["Error: The workbook expands to 2 MB, more than the 1 MB limit."]
+
+def test_only_a_non_active_sheet_matches():
+    data = workbook((['Notes'], 0), (HEADER, 3), active=0)
+    assert slot_prescreen.screen(data, schema) is None
+    assert full_check(data).passed
+
+def test_only_a_non_active_sheet_matches_but_has_too_many_rows():
+    data = workbook((['Notes'], 0), (HEADER, 6), active=0)
+    result = slot_prescreen.screen(data, schema)
+    assert result.status == TOO_MANY_ROWS
+    assert list(result.messages()) == list(full_check(data).messages())
+
+@pytest.mark.parametrize('sheets, active', [
+    ([(HEADER[:2], 3)], 0),
+    ([(HEADER[:3], 3), (['MIPS'], 3)], 1),
+])
+def test_missing_columns_message_matches_the_full_check(sheets, active):
+    data = workbook(*sheets, active=active)
+    result = slot_prescreen.screen(data, schema)
+    full = full_check(data)
+    assert result.status == full.status == MISSING_COLUMNS
+    assert list(result.messages()) == list(full.messages())
+
+def test_too_many_rows_message_matches_the_full_check():
+    data = workbook((HEADER, 6))
+    result = slot_prescreen.screen(data, schema)
+    full = full_check(data)
+    assert result.status == full.status == TOO_MANY_ROWS
+    assert list(result.messages()) == list(full.messages())
+    assert slot_prescreen.screen(workbook((HEADER, 5)), schema) is None
@@ -0,0 +1,68 @@
+import random
+from datetime import date
+
+from slot_schedule import Slot, SlotSchedule, MAX_LISTED_CONFLICTS
+
+DAY = date(2026, 1, 1)
+
+def slot(start, end, source='T-1', row=2, mips=10.0, day=DAY):
+    return Slot(day, start, end, mips, source, row)
+
+def brute_force(slots, query):
+    return sorted(id(other) for other in slots
+                  if other.date == query.date and other.start < query.end and other.end > query.start)
+
+def test_overlapping_matches_a_pairwise_scan():
+    rng = random.Random(7)
+    for _ in range(100):
+        schedule = SlotSchedule()
+        slots = []
+        for row in range(rng.randint(1, 40)):
+            start = rng.randint(0, 1438)
+            end = rng.randint(start + 1, 1439)
+            if rng.random() < 0.1:
+                start, end = 0, 1439  # all-day slots sit at the root of the tree
+            slots.append(slot(start, end, f'T-{rng.randint(1, 4)}', row, day=date(2026, 1, rng.randint(1, 2))))
+        for source in sorted({other.source for other in slots}):
+            schedule.replace_source(source, [other for other in slots if other.source == source])
+        schedule.remove_source('T-1')
+        kept = [other for other in slots if other.source != 'T-1']
+        for _ in range(20):
+            start = rng.randint(0, 1438)
+            query = slot(start, rng.randint(start + 1, 1439), 'Q')
+            found, count = schedule.overlapping(query)
+            assert sorted(map(id, found)) == brute_force(kept, query)
+            assert count == len(found)
+
+def test_overlapping_counts_past_the_limit():
+    schedule = SlotSchedule()
+    schedule.add_many([slot(600, 660, 'T-1', row) for row in range(2, 12)])
+    found, count = schedule.overlapping(slot(630, 640, 'T-2'), limit=3)
+    assert len(found) == 3
+    assert count == 10
+
+def test_conflicts_are_grouped_per_slot():
+    # Five identical rows: one message per row after the first, not one per pair
+    schedule = SlotSchedule()
+    messages = schedule.replace_source('T-1', [slot(600, 660, 'T-1', row) for row in range(2, 7)])
+    assert len(messages) == 4
+    assert messages[-1].startswith("Conflict: row 6 of T-1 (2026-01-01 10:00-11:00) overlaps row 2 of T-1")
+    assert messages[-1].count(' of T-1 (') == 1 + MAX_LISTED_CONFLICTS
+    assert messages[-1].endswith(" and 1 more.")
+
+def test_touching_slots_do_not_overlap():
+    schedule = SlotSchedule()
+    schedule.add(slot(600, 660))
+    assert schedule.add(slot(660, 720, 'T-2')) == []
+    assert len(schedule.add(slot(659, 661, 'T-3'))) == 1
+
+def test_load_is_rebuilt_when_a_ticket_is_replaced():
+    schedule = SlotSchedule(capacity=10.2)
+    schedule.add(slot(600, 660, 'T-1', mips=0.1))
+    schedule.add(slot(600, 720, 'T-2', mips=0.2))
+    assert len(schedule.replace_source('T-3', [slot(600, 660, 'T-3', mips=10.0)])) == 2
+    schedule.replace_source('T-3', [])
+    schedule.remove_source('T-1')
+    assert schedule.load(DAY)[10:12] == [0.2, 0.2]
+    assert schedule.has_source('T-3')
+    assert not schedule.has_source('T-1')
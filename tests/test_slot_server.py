@@ -0,0 +1,42 @@
+import sys
+import threading
+import pytest
+
+pytest.importorskip('openpyxl')
+
+from generate_workbooks import make_workbook
+from slot_server import SlotServer, submit
+from validate_slots import layout_schema
+
+# The resident validator over a real socket, without JIRA
+
+@pytest.fixture
+def server():
+    server = SlotServer(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def run(server, job):
+    return submit(job, server.server_address[1], timeout=30)
+
+def test_unknown_layout_is_not_imported(server, tmp_path, monkeypatch):
+    # A module on sys.path that leaves a marker file behind if anything imports it
+    marker = tmp_path / 'imported'
+    (tmp_path / 'not_a_layout.py').write_text(f"open({str(marker)!r}, 'w').close()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    reply = run(server, {'job': 'validate', 'layout': 'not_a_layout', 'path': str(tmp_path / 'x.xlsx')})
+    assert reply['status'] == 'failed'
+    assert 'Unknown layout' in reply['error']
+    with pytest.raises(ValueError):
+        layout_schema('not_a_layout')
+    assert not marker.exists()
+    assert 'not_a_layout' not in sys.modules
+
+def test_known_layout_is_validated(server, tmp_path):
+    path = tmp_path / 'request.xlsx'
+    path.write_bytes(make_workbook(3, 'row1', 0.0, 'HH'))
+    reply = run(server, {'job': 'validate', 'layout': 'Fourth', 'path': str(path)})
+    assert reply['status'] == 'passed'
@@ -0,0 +1,164 @@
+import threading
+from datetime import datetime, timedelta, timezone
+import pytest
+
+jira_module = pytest.importorskip('jira')
+
+from bench_jira_client import StubJira, jira_time
+from generate_workbooks import make_workbook
+from slot_watcher import SlotWatcher, parse_jira_time
+
+# SlotWatcher against the local stub JIRA: a real jira client and HTTP, no JIRA server
+
+@pytest.fixture
+def stub():
+    stub = StubJira(latency=0, error_rate=0, workbook=make_workbook(3, 'row1', 0.0, 'HH'))
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+@pytest.fixture
+def client(stub):
+    # max_retries=0: a 503 reaches the watcher instead of being retried by the client
+    return jira_module.JIRA(options={'server': stub.url}, basic_auth=('user', 'password'), max_retries=0)
+
+def minutes_ago(minutes):
+    return jira_time(datetime.now(timezone.utc) - timedelta(minutes=minutes))
+
+def make_watcher(client, tmp_path, **options):
+    return SlotWatcher(client, 'project = SLOT', state_path=str(tmp_path / 'state.json'), retries=0, **options)
+
+def start_workers(watcher, count=1):
+    threads = [threading.Thread(target=watcher.worker, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def stop_workers(watcher, threads):
+    for _ in threads:
+        watcher.queue.put(None)
+    for thread in threads:
+        thread.join(10)
+
+def poll(watcher):
+    enqueued = watcher.poll_once()
+    watcher.queue.join()
+    return enqueued
+
+def test_own_comments_do_not_requeue_the_ticket(stub, client, tmp_path):
+    # No attachment cache: only the recorded comment time keeps the watcher from
+    # validating and commenting on the ticket after every poll
+    stub.updated['SLOT-1'] = minutes_ago(5)
+    watcher = make_watcher(client, tmp_path)
+    threads = start_workers(watcher)
+    try:
+        assert [poll(watcher) for _ in range(4)] == [1, 0, 0, 0]
+    finally:
+        stop_workers(watcher, threads)
+    assert len(stub.comments['SLOT-1']) == 1
+    assert watcher.processed == 1
+
+def test_a_later_edit_is_validated_again(stub, client, tmp_path):
+    stub.updated['SLOT-1'] = minutes_ago(5)
+    watcher = make_watcher(client, tmp_path)
+    threads = start_workers(watcher)
+    try:
+        assert poll(watcher) == 1
+        stub.updated['SLOT-1'] = jira_time(datetime.now(timezone.utc) + timedelta(seconds=5))
+        assert poll(watcher) == 1
+    finally:
+        stop_workers(watcher, threads)
+    assert len(stub.comments['SLOT-1']) == 2
+
+def test_failed_ticket_is_retried(stub, client, tmp_path):
+    stub.updated['SLOT-1'] = minutes_ago(30)
+    stub.updated['SLOT-2'] = minutes_ago(5)
+    stub.failures['SLOT-1'] = 1  # one transient 503 from jira.issue
+    watcher = make_watcher(client, tmp_path)
+    threads = start_workers(watcher)
+    try:
+        assert poll(watcher) == 2
+        assert watcher.failed == 1
+        # The saved watermark is held at the failed ticket, not at the newest one
+        watcher.save_state()
+        assert make_watcher(client, tmp_path).watermark == parse_jira_time(stub.updated['SLOT-1'])
+        assert poll(watcher) == 1
+        assert poll(watcher) == 0
+    finally:
+        stop_workers(watcher, threads)
+    assert watcher.processed == 2
+    assert len(stub.comments['SLOT-1']) == 1
+    assert len(stub.comments['SLOT-2']) == 1
+
+def test_failing_ticket_is_given_up_after_max_attempts(stub, client, tmp_path):
+    stub.updated['SLOT-1'] = minutes_ago(5)
+    stub.failures['SLOT-1'] = 100
+    watcher = make_watcher(client, tmp_path, max_attempts=3)
+    threads = start_workers(watcher)
+    try:
+        assert [poll(watcher) for _ in range(5)] == [1, 1, 1, 0, 0]
+    finally:
+        stop_workers(watcher, threads)
+    assert watcher.failed == 3
+    assert not watcher.retry
+
+def test_watermark_survives_a_restart(stub, client, tmp_path):
+    stub.updated['SLOT-1'] = minutes_ago(10)
+    stub.updated['SLOT-2'] = minutes_ago(5)
+    watcher = make_watcher(client, tmp_path)
+    threads = start_workers(watcher)
+    try:
+        assert poll(watcher) == 2
+    finally:
+        stop_workers(watcher, threads)
+    watcher.save_state()
+
+    restarted = make_watcher(client, tmp_path)
+    assert restarted.watermark == watcher.watermark
+    assert restarted.seen == watcher.seen
+    threads = start_workers(restarted)
+    try:
+        assert poll(restarted) == 0
+        stub.updated['SLOT-3'] = jira_time(datetime.now(timezone.utc) + timedelta(seconds=5))
+        assert poll(restarted) == 1
+    finally:
+        stop_workers(restarted, threads)
+    assert sorted(stub.comments) == ['SLOT-1', 'SLOT-2', 'SLOT-3']
+    assert all(len(bodies) == 1 for bodies in stub.comments.values())
+
+def test_unfinished_ticket_is_polled_again_after_a_restart(stub, client, tmp_path):
+    stub.updated['SLOT-1'] = minutes_ago(5)
+    watcher = make_watcher(client, tmp_path)
+    assert watcher.poll_once() == 1  # queued, but no worker ever takes it
+
+    restarted = make_watcher(client, tmp_path)
+    threads = start_workers(restarted)
+    try:
+        assert poll(restarted) == 1
+    finally:
+        stop_workers(restarted, threads)
+    assert len(stub.comments['SLOT-1']) == 1
+
+def test_full_queue_blocks_polling(stub, client, tmp_path):
+    for n in range(4):
+        stub.updated[f'SLOT-{n}'] = minutes_ago(10 - n)
+    watcher = make_watcher(client, tmp_path, queue_size=1)
+    poller = threading.Thread(target=watcher.poll_once, daemon=True)
+    poller.start()
+    poller.join(1)
+    # One ticket fits in the queue and the poller is stuck on the second
+    assert poller.is_alive()
+    assert watcher.queue.full()
+    assert len(watcher.pending) == 2
+
+    threads = start_workers(watcher)
+    try:
+        poller.join(30)
+        assert not poller.is_alive()
+        watcher.queue.join()
+    finally:
+        stop_workers(watcher, threads)
+    assert watcher.processed == 4
+    assert not watcher.pending
@@ -0,0 +1,101 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+from time import perf_counter
+
+# Bulk validation of slot-request workbooks from the command line, e.g.
+#
+#   python validate_slots.py --layout FinalValidation1 "\\share\slot-drop" extra\*.xlsx
+#
+# Files are validated on a process pool with the same schema and code path as the
+# layout's own validate_excel_file; --columnar switches to the NumPy column checks for
+# capacity-planning uploads, which also lifts the layout's data-row limit. One JSON
+# object per file is written to stdout as soon as that file is done; a
+# throughput/latency summary goes to stderr at the end.
+
+LAYOUTS = ['FinalValidation', 'FinalValidation1', 'Fourth', 'fifth']
+
+_schemas = {}
+
+def layout_schema(layout):
+    # Imported in the worker, since schemas hold closures and cannot be pickled. Only the
+    # known layouts: the name can come from a slot_server job, and importing a module runs it.
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)}")
+    if layout not in _schemas:
+        _schemas[layout] = importlib.import_module(layout).schema
+    return _schemas[layout]
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.lower().endswith('.xlsx') and not name.startswith('~$'))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))  # drop duplicates, keep order
+
+def validate_file(layout, path, columnar=False):
+    start = perf_counter()
+    record = {'file': path, 'layout': layout}
+    if not os.path.exists(path):
+        record.update(status='unreadable', messages=[f"Error: File not found at {path}"])
+    else:
+        try:
+            result = layout_schema(layout).check(path, columnar)
+            record.update(result.to_dict())
+            record['messages'] = list(result.messages())
+        except Exception as e:
+            record.update(status='unreadable', messages=[f"Error: Could not read {path}: {e!r}"])
+    record['elapsed_ms'] = round((perf_counter() - start) * 1000, 3)
+    return record
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate slot-request workbooks in bulk.")
+    parser.add_argument('paths', nargs='+', help="files, glob patterns or directories")
+    parser.add_argument('--layout', choices=LAYOUTS, default='FinalValidation1',
+                        help="which validator's schema to apply (default: FinalValidation1)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument('--columnar', action='store_true',
+                        help="check columns in bulk with NumPy, with no data-row limit")
+    args = parser.parse_args(argv)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    paths = expand_paths(args.paths)
+    start = perf_counter()
+    latencies = []
+    counts = {}
+    with ProcessPoolExecutor(args.workers) as pool:
+        futures = [pool.submit(validate_file, args.layout, path, args.columnar) for path in paths]
+        for future in as_completed(futures):
+            record = future.result()
+            sys.stdout.write(json.dumps(record, default=str) + '\n')
+            sys.stdout.flush()
+            latencies.append(record['elapsed_ms'])
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+
+    elapsed = perf_counter() - start
+    latencies.sort()
+    rate = len(paths) / elapsed if elapsed > 0 else 0.0
+    statuses = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Validated {len(paths)} files in {elapsed:.2f}s ({rate:.1f} files/sec) with {args.workers} workers: {statuses or 'none'}.",
+          file=sys.stderr)
+    print(f"Per-file latency: p50 {percentile(latencies, 0.5):.1f} ms, p95 {percentile(latencies, 0.95):.1f} ms, "
+          f"max {latencies[-1] if latencies else 0.0:.1f} ms.", file=sys.stderr)
+    return 0 if counts.get('passed', 0) == len(paths) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())